@@ -0,0 +1,30 @@
+"""Add composite indexes for hot lookup paths
+
+Revision ID: 3b8d2a61c4e7
+Revises: c7209f9431e5
+Create Date: 2026-10-16 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d2a61c4e7'
+down_revision: Union[str, None] = 'c7209f9431e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_analyses_user_created', 'analyses', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_deriv_trade_conn_time', 'deriv_trades', ['connection_id', 'purchase_time'], unique=False)
+    op.create_index('uq_deriv_trade_conn_trade', 'deriv_trades', ['connection_id', 'deriv_trade_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_deriv_trade_conn_trade', table_name='deriv_trades')
+    op.drop_index('ix_deriv_trade_conn_time', table_name='deriv_trades')
+    op.drop_index('ix_analyses_user_created', table_name='analyses')
@@ -0,0 +1,37 @@
+"""Denormalize the analysis score into its own column
+
+Revision ID: 5d2c7e9b1f30
+Revises: 8e1f5c0d9a42
+Create Date: 2026-10-16 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c7e9b1f30'
+down_revision: Union[str, None] = '8e1f5c0d9a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('analyses', sa.Column('score', sa.Float(), nullable=True))
+
+    # Backfill from the JSON score_result
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "UPDATE analyses SET score = CAST(json_extract(score_result, '$.score') AS REAL)"
+        )
+    else:
+        op.execute(
+            "UPDATE analyses SET score = CAST(score_result ->> 'score' AS DOUBLE PRECISION)"
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('analyses') as batch_op:
+        batch_op.drop_column('score')
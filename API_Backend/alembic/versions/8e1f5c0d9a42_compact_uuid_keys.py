@@ -0,0 +1,86 @@
+"""Store primary and foreign keys as compact UUIDs
+
+Revision ID: 8e1f5c0d9a42
+Revises: 3b8d2a61c4e7
+Create Date: 2026-10-16 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1f5c0d9a42'
+down_revision: Union[str, None] = '3b8d2a61c4e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Every primary key and UUID foreign key, by table
+ID_COLUMNS = {
+    'users': ['id'],
+    'user_settings': ['id', 'user_id'],
+    'analyses': ['id', 'user_id'],
+    'reports': ['id', 'analysis_id'],
+    'predictive_alerts': ['id', 'user_id', 'analysis_id'],
+    'alert_settings': ['id', 'user_id'],
+    'alert_history': ['id', 'alert_id', 'user_id'],
+    'deriv_connections': ['id', 'user_id'],
+    'deriv_trades': ['id', 'connection_id', 'analysis_id'],
+    'sync_logs': ['id', 'connection_id', 'analysis_id'],
+    'webhook_events': ['id', 'connection_id', 'analysis_id'],
+}
+
+
+def _convert_postgresql(type_, using):
+    """Change key column types in place; FKs must be dropped around the change"""
+    inspector = sa.inspect(op.get_bind())
+    foreign_keys = [(table, fk) for table in ID_COLUMNS for fk in inspector.get_foreign_keys(table)]
+
+    for table, fk in foreign_keys:
+        op.drop_constraint(fk['name'], table, type_='foreignkey')
+
+    for table, columns in ID_COLUMNS.items():
+        for column in columns:
+            op.alter_column(table, column, type_=type_, postgresql_using=using.format(column=column))
+
+    for table, fk in foreign_keys:
+        op.create_foreign_key(
+            fk['name'], table, fk['referred_table'],
+            fk['constrained_columns'], fk['referred_columns']
+        )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _convert_postgresql(postgresql.UUID(as_uuid=False), '{column}::uuid')
+        return
+
+    # Other dialects store the 32-char hex form
+    for table, columns in ID_COLUMNS.items():
+        for column in columns:
+            op.execute(f"UPDATE {table} SET {column} = REPLACE({column}, '-', '') WHERE {column} IS NOT NULL")
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, type_=sa.CHAR(32), existing_type=sa.String())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        _convert_postgresql(sa.String(), '{column}::text')
+        return
+
+    for table, columns in ID_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, type_=sa.String(), existing_type=sa.CHAR(32))
+        for column in columns:
+            op.execute(
+                f"UPDATE {table} SET {column} = "
+                f"substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' || "
+                f"substr({column}, 13, 4) || '-' || substr({column}, 17, 4) || '-' || substr({column}, 21) "
+                f"WHERE {column} IS NOT NULL AND length({column}) = 32"
+            )
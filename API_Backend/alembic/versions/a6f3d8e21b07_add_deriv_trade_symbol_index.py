@@ -0,0 +1,26 @@
+"""Index Deriv trades by connection and symbol
+
+Revision ID: a6f3d8e21b07
+Revises: 5d2c7e9b1f30
+Create Date: 2026-10-16 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f3d8e21b07'
+down_revision: Union[str, None] = '5d2c7e9b1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_deriv_trade_conn_symbol', 'deriv_trades', ['connection_id', 'symbol'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_deriv_trade_conn_symbol', table_name='deriv_trades')
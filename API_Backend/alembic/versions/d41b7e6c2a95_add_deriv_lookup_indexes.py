@@ -0,0 +1,30 @@
+"""Index Deriv connections, trade status and sync logs for router lookups
+
+Revision ID: d41b7e6c2a95
+Revises: a6f3d8e21b07
+Create Date: 2026-10-16 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e6c2a95'
+down_revision: Union[str, None] = 'a6f3d8e21b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_deriv_conn_user_app_account', 'deriv_connections', ['user_id', 'app_id', 'account_id'], unique=False)
+    op.create_index('ix_deriv_trade_conn_status', 'deriv_trades', ['connection_id', 'status'], unique=False)
+    op.create_index('ix_sync_log_conn_started', 'sync_logs', ['connection_id', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_log_conn_started', table_name='sync_logs')
+    op.drop_index('ix_deriv_trade_conn_status', table_name='deriv_trades')
+    op.drop_index('ix_deriv_conn_user_app_account', table_name='deriv_connections')
@@ -0,0 +1,98 @@
+"""
+TradeGuard FastAPI application: startup/shutdown lifespan, CORS and routers.
+Served as main:app (main.py re-exports it).
+"""
+import sys
+import os
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Add api directory to Python path
+sys.path.append(os.path.dirname(__file__))
+
+# Import database FIRST to create tables
+from api.database import init_db, engine, async_engine, Base
+from api import models  # This imports all models
+from api.auth import calibrate_bcrypt_rounds
+from core.analysis_pipeline import shutdown_analysis_executor
+
+# Import routers
+from api.routers import analyze, risk, reports, users, dashboard, alerts, integrations
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: Initialize database - THIS MUST HAPPEN
+    print("Starting TradeGuard API...")
+    init_db()
+    print(f"bcrypt cost factor: {calibrate_bcrypt_rounds()}")
+    integrations.start_webhook_writer()
+    integrations.start_sync_workers()
+    
+    yield
+    
+    # Shutdown
+    print("Shutting down TradeGuard API")
+    await integrations.stop_sync_workers()
+    await integrations.stop_webhook_writer()
+    await async_engine.dispose()
+    engine.dispose()
+    shutdown_analysis_executor()
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="TradeGuard AI API",
+    description="API for trading risk analysis and educational insights",
+    version="1.0.0",
+    docs_url="/docs",
+    redoc_url="/redoc",
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000", "http://localhost:3001"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Include routers
+app.include_router(analyze.router, prefix="/api/analyze", tags=["Analysis"])
+app.include_router(risk.router, prefix="/api/risk", tags=["Risk Assessment"])
+app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(alerts.router, prefix="/api/alerts", tags=["Predictive Alerts"])
+app.include_router(integrations.router, prefix="/api/integrations", tags=["Integrations"])
+
+# Health check endpoints
+@app.get("/")
+async def root():
+    return {
+        "message": "TradeGuard AI API",
+        "version": "1.0.0",
+        "status": "operational",
+        "docs": "/docs",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "version": "1.0.0",
+        "db_pool": {
+            "size": async_engine.pool.size(),
+            "checked_out": async_engine.pool.checkedout()
+        }
+    }
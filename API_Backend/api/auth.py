@@ -1,24 +1,42 @@
 """
 Authentication with robust password hashing (bcrypt safe)
 """
+import hashlib
+import os
+import statistics
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import bcrypt
+from cachetools import TTLCache
+import jwt
+from jwt import InvalidTokenError as JWTError
 from fastapi import Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from api.config import settings
 from api.database import get_db
 from api import models
 
-# Secret settings (use .env in production)
-SECRET_KEY = "your-secret-key-change-in-production"
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
+# Secret settings, read once from the environment / .env via settings
+INSECURE_SECRET_KEYS = {"", "your-secret-key-change-in-production", "your-secret-key-here-change-in-production"}
 
-# Password hashing (bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+SECRET_KEY = settings.SECRET_KEY
+if SECRET_KEY.strip() in INSECURE_SECRET_KEYS:
+    raise RuntimeError("SECRET_KEY is empty or a placeholder; set a real secret in the environment or .env")
+ALGORITHM = settings.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+
+# Password hashing (bcrypt cost factor, calibrated at startup but never below the floor)
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 14
+BCRYPT_ROUNDS = BCRYPT_MIN_ROUNDS
+TARGET_HASH_MS = float(os.getenv("TARGET_HASH_MS", "100"))
 
 # JWT token
 security = HTTPBearer()
@@ -26,20 +44,78 @@ security = HTTPBearer()
 # Max bcrypt password length
 BCRYPT_MAX_LENGTH = 72
 
+# Verified-token and user caches (keyed by token hash, never the raw token).
+# The user cache holds immutable snapshots; updates in this process evict them
+# at once, other workers see the change within USER_CACHE_TTL_SECONDS.
+TOKEN_CACHE_TTL_SECONDS = 30
+USER_CACHE_TTL_SECONDS = 10
+_token_cache = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL_SECONDS)
+_user_cache = TTLCache(maxsize=5000, ttl=USER_CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+
 # --------------------------
 # Password hashing & verification
 # --------------------------
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _sync_verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a bcrypt hash"""
-    return pwd_context.verify(plain_password[:BCRYPT_MAX_LENGTH], hashed_password)
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode("utf-8")[:BCRYPT_MAX_LENGTH],
+            hashed_password.encode("utf-8")
+        )
+    except ValueError:
+        # Malformed or unsupported hash
+        return False
+
+def calibrate_bcrypt_rounds(target_ms: float = TARGET_HASH_MS, samples: int = 3) -> int:
+    """
+    Raise the bcrypt cost above BCRYPT_MIN_ROUNDS while the predicted hash
+    time still fits the target latency. The floor is only timed once: each
+    extra round doubles bcrypt's work, which predicts the higher costs.
+    """
+    global BCRYPT_ROUNDS
+    sample_password = b"tradeguard-calibration-password"
+
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(sample_password, bcrypt.gensalt(rounds=BCRYPT_MIN_ROUNDS))
+        timings.append((time.perf_counter() - start) * 1000)
+    floor_ms = statistics.median(timings)
+
+    chosen = BCRYPT_MIN_ROUNDS
+    while chosen < BCRYPT_MAX_ROUNDS and floor_ms * 2 ** (chosen + 1 - BCRYPT_MIN_ROUNDS) <= target_ms:
+        chosen += 1
 
-def get_password_hash(password: str) -> str:
+    BCRYPT_ROUNDS = chosen
+    return chosen
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash is weaker than the configured cost factor.
+    Stronger hashes are kept, so workers calibrated differently never
+    downgrade or flip-flop a user's hash.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) < BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+def _sync_get_password_hash(password: str) -> str:
     """Hash a password safely (truncate to bcrypt max length)"""
     if not password:
         raise ValueError("Password cannot be empty")
     # truncate password to 72 bytes to avoid bcrypt error
-    truncated_password = password[:BCRYPT_MAX_LENGTH]
-    return pwd_context.hash(truncated_password)
+    truncated_password = password.encode("utf-8")[:BCRYPT_MAX_LENGTH]
+    return bcrypt.hashpw(truncated_password, bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the threadpool so bcrypt doesn't block the event loop"""
+    return await run_in_threadpool(_sync_verify_password, plain_password, hashed_password)
+
+async def get_password_hash(password: str) -> str:
+    """Hash a password in the threadpool so bcrypt doesn't block the event loop"""
+    return await run_in_threadpool(_sync_get_password_hash, password)
 
 # --------------------------
 # JWT token handling
@@ -55,13 +131,79 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_cache_key(token: str) -> bytes:
+    """Hash a token for use as a cache key"""
+    # Lookups match on the digest, so no raw token is ever compared directly
+    return hashlib.sha256(token.encode()).digest()[:16]
+
 def decode_access_token(token: str):
-    """Decode a JWT token"""
+    """Decode a JWT token (verified payloads are cached briefly)"""
+    key = _token_cache_key(token)
+    now = time.time()
+
+    with _cache_lock:
+        cached = _token_cache.get(key)
+    if cached is not None:
+        payload, expires_at = cached
+        if expires_at > now:
+            return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
+        # Failed verifications are never cached
+        return None
+
+    expires_at = min(payload.get("exp", now), now + TOKEN_CACHE_TTL_SECONDS)
+    with _cache_lock:
+        _token_cache[key] = (payload, expires_at)
+    return payload
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Read-only snapshot of the user fields the auth dependencies hand out"""
+    id: str
+    email: str
+    username: str
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user: models.User) -> "AuthenticatedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            is_active=bool(user.is_active),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+def invalidate_user(user_id: str):
+    """Drop a cached user snapshot (call after bulk UPDATEs that bypass the ORM)"""
+    with _cache_lock:
+        _user_cache.pop(str(user_id), None)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    invalidate_user(target.id)
+
+def _get_user_by_id(db: Session, user_id: str) -> Optional[AuthenticatedUser]:
+    """Resolve a user by ID, serving recent lookups from the user cache"""
+    with _cache_lock:
+        user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    row = db.query(models.User).filter(models.User.id == user_id).first()
+    if row is None:
         return None
+    user = AuthenticatedUser.from_model(row)
+    with _cache_lock:
+        _user_cache[user_id] = user
+    return user
 
 # --------------------------
 # Dependency functions
@@ -86,12 +228,12 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = _get_user_by_id(db, user_id)
     if user is None:
         raise credentials_exception
     return user
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+async def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -110,7 +252,7 @@ async def get_optional_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             return None
-        user = db.query(models.User).filter(models.User.id == user_id).first()
+        user = _get_user_by_id(db, user_id)
         return user
     except Exception:
         return None
@@ -1,12 +1,13 @@
 """
 Database setup with AsyncIO support
 """
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 import os
 import sys
+import uuid
 
 # DATABASE CONFIG
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./tradeguard.db")
@@ -20,23 +21,54 @@ if "+aiosqlite" in DATABASE_URL or "+asyncpg" in DATABASE_URL:
 else:
     ASYNC_DATABASE_URL = DATABASE_URL.replace(search_string, replace_string, 1)
 
+# SQL statement logging follows the DEBUG flag (off by default)
+SQL_ECHO = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
 # =====================================================
 # SYNCHRONOUS SETUP (LEGACY)
 # =====================================================
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=3600,
+    pool_pre_ping=True,
+    echo=SQL_ECHO
 )
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # =====================================================
 # ASYNCHRONOUS SETUP (NEW)
 # =====================================================
+# Set when PostgreSQL is reached through PgBouncer in transaction pooling mode
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+def _async_connect_args() -> dict:
+    if "sqlite" in DATABASE_URL:
+        return {"check_same_thread": False}
+    if DB_PGBOUNCER:
+        # Server connections change between transactions, so asyncpg's
+        # per-connection prepared statements must be uncached and uniquely named
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {}
+
+# Long-lived pooled connections: pre-ping drops dead ones, recycle stays under
+# typical server idle timeouts. Size the pool to workers x concurrent requests
+# (behind PgBouncer a small per-worker pool, e.g. DB_POOL_SIZE=5, is enough).
 async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False
+    connect_args=_async_connect_args(),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    echo=SQL_ECHO
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -46,6 +78,26 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+# =====================================================
+# SQLITE TUNING
+# =====================================================
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",       # readers don't block the writer
+    "PRAGMA synchronous=NORMAL",     # fsync at checkpoints, safe with WAL
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+    "PRAGMA cache_size=-65536",      # 64 MB page cache
+)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
 # Base class
 Base = declarative_base()
 
@@ -85,7 +137,7 @@ async def init_async_db():
         print(f"❌ Error initializing async database: {e}")
         return False
 
-# Dependency for Sync routes
+# Dependency for Sync routes (one session per dependency, closed when the request ends)
 def get_db():
     db = SessionLocal()
     try:
@@ -10,24 +10,22 @@ logger = logging.getLogger("api")
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        # Start time
-        start_time = time.time()
+        # Start time (monotonic, unaffected by clock adjustments)
+        start_time = time.perf_counter()
         
         # Process request
         response = await call_next(request)
         
         # Calculate processing time
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
         
-        # Log request
+        # Log request (formatted lazily, only if INFO is enabled)
         logger.info(
-            f"Method: {request.method} "
-            f"Path: {request.url.path} "
-            f"Status: {response.status_code} "
-            f"Duration: {process_time:.4f}s"
+            "Method: %s Path: %s Status: %d Duration: %.4fs",
+            request.method, request.url.path, response.status_code, process_time
         )
         
         # Add X-Process-Time header
         response.headers["X-Process-Time"] = str(process_time)
         
-        return response
\ No newline at end of file
+        return response
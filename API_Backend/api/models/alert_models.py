@@ -6,6 +6,7 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from api.database import Base
+from api.models.types import GUID
 
 def generate_uuid():
     return str(uuid.uuid4())
@@ -13,9 +14,9 @@ def generate_uuid():
 class PredictiveAlert(Base):
     __tablename__ = "predictive_alerts"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    analysis_id = Column(String, ForeignKey("analyses.id"), nullable=True)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
+    analysis_id = Column(GUID(), ForeignKey("analyses.id"), nullable=True)
     
     # Alert details
     alert_type = Column(String, nullable=False)  # "pattern", "behavioral", "time_based", "market"
@@ -73,8 +74,8 @@ class PredictiveAlert(Base):
 class AlertSettings(Base):
     __tablename__ = "alert_settings"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), unique=True, nullable=False)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    user_id = Column(GUID(), ForeignKey("users.id"), unique=True, nullable=False)
     
     # Alert preferences
     enabled = Column(Boolean, default=True)
@@ -127,9 +128,9 @@ class AlertSettings(Base):
 class AlertHistory(Base):
     __tablename__ = "alert_history"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    alert_id = Column(String, ForeignKey("predictive_alerts.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    alert_id = Column(GUID(), ForeignKey("predictive_alerts.id"), nullable=False)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
     
     # Action details
     action = Column(String, nullable=False)  # "created", "acknowledged", "snoozed", "expired"
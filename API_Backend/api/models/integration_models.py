@@ -1,11 +1,12 @@
 """
 Database models for Deriv/MT5 integration
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from api.database import Base
+from api.models.types import GUID
 
 def generate_uuid():
     return str(uuid.uuid4())
@@ -13,8 +14,8 @@ def generate_uuid():
 class DerivConnection(Base):
     __tablename__ = "deriv_connections"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=False)
     
     # Deriv API credentials (encrypted)
     api_token_encrypted = Column(Text, nullable=False)  # Encrypted API token
@@ -24,7 +25,7 @@ class DerivConnection(Base):
     # Connection metadata
     connection_name = Column(String, default="Deriv Account")
     connection_status = Column(String, default="disconnected")  # "connected", "disconnected", "error"
-    last_sync_status = Column(String, nullable=True)  # "success", "failed", "partial"
+    last_sync_status = Column(String, nullable=True)  # "syncing", "success", "failed", "partial"
     
     # Account info (cached from Deriv)
     account_info = Column(JSON, nullable=True)  # Balance, currency, etc.
@@ -56,38 +57,17 @@ class DerivConnection(Base):
     synced_trades = relationship("DerivTrade", back_populates="connection", cascade="all, delete-orphan")
     sync_logs = relationship("SyncLog", back_populates="connection", cascade="all, delete-orphan")
     
-    def to_dict(self, include_sensitive=False):
-        """Convert to dictionary, optionally including sensitive info"""
-        data = {
-            "id": self.id,
-            "connection_name": self.connection_name,
-            "connection_status": self.connection_status,
-            "account_id": self.account_id,
-            "account_type": self.account_type,
-            "auto_sync": self.auto_sync,
-            "sync_frequency": self.sync_frequency,
-            "last_sync_at": self.last_sync_at.isoformat() if self.last_sync_at else None,
-            "last_successful_sync": self.last_successful_sync.isoformat() if self.last_successful_sync else None,
-            "total_trades_synced": self.total_trades_synced,
-            "total_syncs": self.total_syncs,
-            "account_info": self.account_info or {},
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "connected_at": self.connected_at.isoformat() if self.connected_at else None,
-            "last_error": self.last_error
-        }
-        
-        if include_sensitive:
-            data["app_id"] = self.app_id
-            # Note: Never expose encrypted token
-        
-        return data
+    __table_args__ = (
+        # Per-user listing and the duplicate-account check on connect
+        Index("ix_deriv_conn_user_app_account", "user_id", "app_id", "account_id"),
+    )
 
 class DerivTrade(Base):
     __tablename__ = "deriv_trades"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    connection_id = Column(String, ForeignKey("deriv_connections.id"), nullable=False)
-    analysis_id = Column(String, ForeignKey("analyses.id"), nullable=True)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    connection_id = Column(GUID(), ForeignKey("deriv_connections.id"), nullable=False)
+    analysis_id = Column(GUID(), ForeignKey("analyses.id"), nullable=True)
     
     # Deriv trade data
     deriv_trade_id = Column(String, nullable=False, index=True)  # Original Deriv trade ID
@@ -132,29 +112,19 @@ class DerivTrade(Base):
     connection = relationship("DerivConnection", back_populates="synced_trades")
     analysis = relationship("Analysis", backref="deriv_trades")
     
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "deriv_trade_id": self.deriv_trade_id,
-            "symbol": self.symbol,
-            "contract_type": self.contract_type,
-            "status": self.status,
-            "stake": self.stake,
-            "profit": self.profit,
-            "purchase_time": self.purchase_time.isoformat() if self.purchase_time else None,
-            "expiry_time": self.expiry_time.isoformat() if self.expiry_time else None,
-            "duration": self.duration,
-            "buy_price": self.buy_price,
-            "sell_price": self.sell_price,
-            "barrier": self.barrier,
-            "payout": self.payout
-        }
+    __table_args__ = (
+        Index("ix_deriv_trade_conn_time", "connection_id", "purchase_time"),
+        Index("ix_deriv_trade_conn_symbol", "connection_id", "symbol"),
+        Index("ix_deriv_trade_conn_status", "connection_id", "status"),
+        # One row per Deriv trade per connection (also the upsert conflict target)
+        Index("uq_deriv_trade_conn_trade", "connection_id", "deriv_trade_id", unique=True),
+    )
 
 class SyncLog(Base):
     __tablename__ = "sync_logs"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    connection_id = Column(String, ForeignKey("deriv_connections.id"), nullable=False)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    connection_id = Column(GUID(), ForeignKey("deriv_connections.id"), nullable=False)
     
     # Sync details
     sync_type = Column(String, nullable=False)  # "initial", "incremental", "manual", "scheduled"
@@ -176,7 +146,7 @@ class SyncLog(Base):
     duration_seconds = Column(Float, nullable=True)
     
     # Results
-    analysis_id = Column(String, ForeignKey("analyses.id"), nullable=True)
+    analysis_id = Column(GUID(), ForeignKey("analyses.id"), nullable=True)
     error_message = Column(Text, nullable=True)
     logs = Column(JSON, nullable=True)  # Detailed sync logs
     
@@ -184,27 +154,15 @@ class SyncLog(Base):
     connection = relationship("DerivConnection", back_populates="sync_logs")
     analysis = relationship("Analysis", backref="sync_logs")
     
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "sync_type": self.sync_type,
-            "status": self.status,
-            "trades_fetched": self.trades_fetched,
-            "trades_new": self.trades_new,
-            "trades_updated": self.trades_updated,
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "end_date": self.end_date.isoformat() if self.end_date else None,
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
-            "duration_seconds": self.duration_seconds,
-            "error_message": self.error_message
-        }
+    __table_args__ = (
+        Index("ix_sync_log_conn_started", "connection_id", "started_at"),
+    )
 
 class WebhookEvent(Base):
     __tablename__ = "webhook_events"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    connection_id = Column(String, ForeignKey("deriv_connections.id"), nullable=True)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    connection_id = Column(GUID(), ForeignKey("deriv_connections.id"), nullable=True)
     
     # Webhook data
     event_type = Column(String, nullable=False)  # "trade_update", "balance_update", "login"
@@ -223,23 +181,11 @@ class WebhookEvent(Base):
     # Result
     trade_id = Column(String, nullable=True)
     analysis_triggered = Column(Boolean, default=False)
-    analysis_id = Column(String, ForeignKey("analyses.id"), nullable=True)
+    analysis_id = Column(GUID(), ForeignKey("analyses.id"), nullable=True)
     
     # Metadata
     received_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     connection = relationship("DerivConnection")
-    analysis = relationship("Analysis", backref="webhook_events")
-    
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "event_type": self.event_type,
-            "event_source": self.event_source,
-            "processed": self.processed,
-            "received_at": self.received_at.isoformat() if self.received_at else None,
-            "processed_at": self.processed_at.isoformat() if self.processed_at else None,
-            "analysis_triggered": self.analysis_triggered,
-            "trade_id": self.trade_id
-        }
\ No newline at end of file
+    analysis = relationship("Analysis", backref="webhook_events")
\ No newline at end of file
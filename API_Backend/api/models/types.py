@@ -0,0 +1,34 @@
+"""
+Shared column types for database models
+"""
+import uuid
+from sqlalchemy.types import TypeDecorator, Uuid
+
+class GUID(TypeDecorator):
+    """
+    Compact UUID column: native UUID on PostgreSQL, CHAR(32) hex elsewhere.
+    Values are returned as canonical UUID strings, so IDs stay plain strings
+    throughout the API. Writing a malformed ID raises ValueError; comparing
+    against one simply matches nothing.
+    """
+    impl = Uuid(as_uuid=False)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return str(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+
+    def coerce_compared_value(self, op, value):
+        return _ComparedGUID()
+
+class _ComparedGUID(GUID):
+    """GUID for the literal side of comparisons, e.g. WHERE id = :id"""
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        try:
+            return super().process_bind_param(value, dialect)
+        except ValueError:
+            # Malformed IDs (e.g. from a URL) can never match a row
+            return None
@@ -1,21 +1,13 @@
 """
 Database models for storing analyses and user data
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Boolean, ForeignKey, Index
 
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 from api.database import Base
-
-"""
-Update main models.py to import alert models
-"""
-# Add at the top
-from .alert_models import PredictiveAlert, AlertSettings, AlertHistory
-
-# Keep all existing models, just add these imports
-
+from api.models.types import GUID
 
 def generate_uuid():
     return str(uuid.uuid4())
@@ -23,7 +15,7 @@ def generate_uuid():
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
     email = Column(String, unique=True, index=True, nullable=False)
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
@@ -31,15 +23,16 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relationships
-    analyses = relationship("Analysis", back_populates="user")
+    # Relationships (lazy="raise" guards against accidental N+1 loads;
+    # use selectinload/joinedload explicitly when a collection is needed)
+    analyses = relationship("Analysis", back_populates="user", lazy="raise")
     settings = relationship("UserSettings", back_populates="user", uselist=False)
 
 class UserSettings(Base):
     __tablename__ = "user_settings"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), unique=True)
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    user_id = Column(GUID(), ForeignKey("users.id"), unique=True)
     
     # Risk thresholds
     max_position_size_pct = Column(Float, default=2.0)
@@ -61,8 +54,8 @@ class UserSettings(Base):
 class Analysis(Base):
     __tablename__ = "analyses"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    user_id = Column(String, ForeignKey("users.id"), nullable=True)  # Nullable for guest analyses
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    user_id = Column(GUID(), ForeignKey("users.id"), nullable=True)  # Nullable for guest analyses
     
     # File info
     filename = Column(String)
@@ -75,6 +68,7 @@ class Analysis(Base):
     risk_results = Column(JSON, nullable=True)
     score_result = Column(JSON, nullable=True)
     ai_explanations = Column(JSON, nullable=True)
+    score = Column(Float, nullable=True)  # Copy of score_result["score"] for filtering/aggregation
     
     # Metadata
     status = Column(String, default="completed")  # pending, processing, completed, failed
@@ -84,14 +78,18 @@ class Analysis(Base):
     completed_at = Column(DateTime, nullable=True)
     
     # Relationships
-    user = relationship("User", back_populates="analyses")
-    reports = relationship("Report", back_populates="analysis")
+    user = relationship("User", back_populates="analyses", lazy="raise")
+    reports = relationship("Report", back_populates="analysis", lazy="raise")
+    
+    __table_args__ = (
+        Index("ix_analyses_user_created", "user_id", "created_at"),
+    )
 
 class Report(Base):
     __tablename__ = "reports"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    analysis_id = Column(String, ForeignKey("analyses.id"))
+    id = Column(GUID(), primary_key=True, default=generate_uuid)
+    analysis_id = Column(GUID(), ForeignKey("analyses.id"))
     
     # Report content
     report_type = Column(String)  # markdown, html, pdf
@@ -102,4 +100,4 @@ class Report(Base):
     generated_at = Column(DateTime, default=datetime.utcnow)
     download_count = Column(Integer, default=0)
     
-    analysis = relationship("Analysis", back_populates="reports")
\ No newline at end of file
+    analysis = relationship("Analysis", back_populates="reports", lazy="raise")
\ No newline at end of file
@@ -149,20 +149,14 @@ async def generate_predictive_alerts(
         
         # Check if we should regenerate (if force or no recent alerts)
         if not request.force_regenerate:
-            recent_alerts = db.query(PredictiveAlert).filter(
+            alerts = db.query(PredictiveAlert).filter(
                 PredictiveAlert.user_id == current_user.id,
                 PredictiveAlert.analysis_id == analysis.id,
                 PredictiveAlert.created_at >= datetime.utcnow() - timedelta(hours=24)
-            ).first()
+            ).all()
             
-            if recent_alerts:
+            if alerts:
                 # Return existing recent alerts
-                alerts = db.query(PredictiveAlert).filter(
-                    PredictiveAlert.user_id == current_user.id,
-                    PredictiveAlert.analysis_id == analysis.id,
-                    PredictiveAlert.created_at >= datetime.utcnow() - timedelta(hours=24)
-                ).all()
-                
                 return schemas.APIResponse.success_response(
                     data={
                         "alerts": [alert.to_dict() for alert in alerts],
@@ -238,23 +232,20 @@ async def generate_predictive_alerts(
                 expires_at=expires_at
             )
             
-            db.add(alert)
             saved_alerts.append(alert)
-            
-            # Create history entry
-            create_alert_history(
-                db=db,
+        
+        # One flush assigns every alert ID, so the history rows can reference them
+        db.add_all(saved_alerts)
+        db.flush()
+        db.add_all([
+            AlertHistory(
                 alert_id=alert.id,
                 user_id=current_user.id,
                 action="created",
-                details={"source": "prediction_engine"}
+                action_details={"source": "prediction_engine"}
             )
-        
-        db.commit()
-        
-        # Refresh to get IDs
-        for alert in saved_alerts:
-            db.refresh(alert)
+            for alert in saved_alerts
+        ])
         
         # Calculate summary
         alert_summary = {
@@ -271,8 +262,12 @@ async def generate_predictive_alerts(
             alert_summary["by_type"][alert.alert_type] = alert_summary["by_type"].get(alert.alert_type, 0) + 1
             alert_summary["by_severity"][alert.severity] = alert_summary["by_severity"].get(alert.severity, 0) + 1
         
+        # Serialize before the commit expires the instances (avoids a reload per alert)
+        alert_dicts = [alert.to_dict() for alert in saved_alerts]
+        db.commit()
+        
         response_data = {
-            "alerts": [alert.to_dict() for alert in saved_alerts],
+            "alerts": alert_dicts,
             "summary": alert_summary,
             "generated_at": datetime.utcnow()
         }
@@ -1,122 +1,181 @@
 """
 API endpoints for trade analysis (Async Optimized)
 """
+import asyncio
+import copy
+import hashlib
+import logging
+import threading
+import uuid
 import pandas as pd
 import io
-import json
 import numpy as np
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, BackgroundTasks
+import orjson
+import pyarrow as pa
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, BackgroundTasks, Request
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func
 from typing import Optional
 from datetime import datetime
+from cachetools import TTLCache
 
 from api import schemas, models, auth
 from api.database import get_async_db  # Updated dependency
-from core.metrics_calculator import TradeMetricsCalculator
-from core.risk_rules import RiskRuleEngine
-from core.risk_scorer import RiskScorer
-from core.ai_explainer import AIRiskExplainer
+from api.utils.openai_keys import get_openai_key_for_user
+from core.ai_explainer import generate_explanation_cached
+from core.analysis_pipeline import score_trade_data, detect_trade_patterns, get_analysis_executor
 
 router = APIRouter()
+logger = logging.getLogger("api")
 
 # =====================================================
 # JSON SAFETY HELPER
 # =====================================================
 
+JSON_SAFE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _json_default(obj):
+    """Fallback for types orjson cannot serialize natively"""
+    if isinstance(obj, np.ndarray):
+        # Non-contiguous or object-dtype arrays
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
 def make_json_safe(obj):
     """
-    Recursively convert NumPy / Pandas types to native Python types
-    so they can be safely serialized to JSON and stored in DB.
+    Convert NumPy / Pandas types to native Python types so they can be
+    safely serialized to JSON and stored in DB.
+    Done as a single orjson round-trip instead of a recursive walk.
     """
-    if isinstance(obj, dict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_json_safe(v) for v in obj]
-    elif isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    else:
-        return obj
+    return orjson.loads(orjson.dumps(obj, default=_json_default, option=JSON_SAFE_OPTIONS))
 
 
-from core.pattern_recognition import PatternDetector
-from core.news_service import NewsService
 
 # =====================================================
-# CORE PROCESSING (CPU-BOUND)
+# CSV PARSING
 # =====================================================
 
-def process_trade_data(df: pd.DataFrame, openai_api_key: Optional[str] = None):
-    """Process trade data and return analysis results (CPU Bound)"""
+CSV_DTYPES = {"profit_loss": "float64", "lot_size": "float64"}
+CSV_DATE_COLUMNS = ["entry_time", "exit_time"]
 
-    # Calculate metrics
-    calculator = TradeMetricsCalculator(df)
-    metrics = calculator.compute_all_metrics()
+def parse_csv_upload(fileobj) -> pd.DataFrame:
+    """
+    Parse a CSV upload straight from its spooled file, avoiding the
+    bytes -> str -> StringIO copies. Uses Arrow's multithreaded reader,
+    falling back to the C parser for files Arrow rejects (e.g. ragged rows).
+    Known columns get dtype hints and dates are parsed on read.
+    """
+    fileobj.seek(0)
+    columns = pd.read_csv(fileobj, nrows=0).columns
+    options = {
+        "dtype": {col: dtype for col, dtype in CSV_DTYPES.items() if col in columns},
+        "parse_dates": [col for col in CSV_DATE_COLUMNS if col in columns],
+    }
+    fileobj.seek(0)
+    try:
+        return pd.read_csv(fileobj, engine="pyarrow", **options)
+    except ValueError:
+        # pyarrow.ArrowInvalid is a ValueError
+        fileobj.seek(0)
+        return pd.read_csv(fileobj, engine="c", **options)
 
-    # Detect risks (Rules)
-    risk_engine = RiskRuleEngine(metrics, df)
-    risk_results = risk_engine.detect_all_risks()
-    
-    # Detect Event Trading Risks (Phase 3)
+def trades_to_dataframe(trades) -> pd.DataFrame:
+    """
+    Build a DataFrame from JSON trade records with Arrow's C++ type inference.
+    The struct type covers keys from every record, not just the first; inputs
+    Arrow cannot type (mixed value types, non-records) go through pandas as before.
+    """
     try:
-        news_service = NewsService()
-        event_risks = []
-        if 'entry_time' in df.columns:
-            # Ensure safe datetime conversion
-            times = pd.to_datetime(df['entry_time'], errors='coerce').dropna()
-            for t in times:
-                # t might be Timestamp, convert to python datetime if needed, or use as is (NewsService handles properties)
-                # Pandas Timestamp has .hour, .minute
-                risk = news_service.check_event_trading_risk(t)
-                if risk:
-                    event_risks.append(risk)
-        
-        if event_risks:
-            # Add to risk_details
-            if "risk_details" not in risk_results:
-                risk_results["risk_details"] = {}
-                
-            risk_results["risk_details"]["event_trading"] = {
-                "name": "News Event Trading",
-                "severity": 85,
-                "description": f"Detected {len(event_risks)} trades executed during high-impact news events (e.g. FOMC, NFP).",
-                "occurrences": len(event_risks)
-            }
-            # Also append to the main list if structure differs, but risk_details is consistent
-            
-    except Exception as e:
-        print(f"News risk detection failed: {e}")
-            
-    # Detect patterns (ML + Heuristics)
+        return pa.RecordBatch.from_struct_array(pa.array(trades)).to_pandas()
+    except (ValueError, TypeError):
+        # pyarrow.ArrowInvalid / ArrowTypeError subclass these
+        return pd.DataFrame(trades)
+
+# =====================================================
+# CORE PROCESSING
+# =====================================================
+
+# Scoring + pattern results by trade-data fingerprint, so repeat submissions
+# (demo data, retries, re-uploads) skip the pandas/ML work. AI explanations
+# are not stored here; they have their own cache in core.ai_explainer.
+# Entries are copied in and out so callers never share or mutate them.
+ANALYSIS_CACHE_TTL_SECONDS = 3600
+_analysis_cache = TTLCache(maxsize=256, ttl=ANALYSIS_CACHE_TTL_SECONDS)
+_analysis_cache_lock = threading.Lock()
+
+def trade_data_fingerprint(df: pd.DataFrame) -> Optional[str]:
+    """Content hash of a trade DataFrame (values, row order, columns), or None if unhashable"""
     try:
-        pattern_detector = PatternDetector(df)
-        patterns = pattern_detector.detect_all_patterns()
-        # Merge patterns into risk_results so they are persisted in the same JSON column
-        risk_results["patterns"] = patterns
-    except Exception as e:
-        print(f"Pattern detection failed: {e}")
-        risk_results["patterns"] = []
-
-    # Calculate score
-    scorer = RiskScorer()
-    score_result = scorer.calculate_score(risk_results["risk_details"])
-
-    # Generate AI explanations using User's Key if provided
-    ai_explainer = AIRiskExplainer(openai_api_key=openai_api_key)
-    ai_explanations = ai_explainer.generate_explanation(
-        metrics,
-        risk_results,
-        score_result
-    )
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        return None
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update("\x1f".join(f"{col}:{dtype}" for col, dtype in df.dtypes.items()).encode())
+    return digest.hexdigest()
+
+
+async def process_trade_data(df: pd.DataFrame, openai_api_key: Optional[str] = None):
+    """
+    Process trade data and return analysis results.
+    Scoring and pattern detection run concurrently in the analysis process
+    pool; the AI explanation (network bound) stays in the threadpool and
+    overlaps with pattern detection.
+    Identical trade data reuses the cached scoring and pattern results.
+    """
+    fingerprint = await run_in_threadpool(trade_data_fingerprint, df)
+    cached = None
+    if fingerprint is not None:
+        with _analysis_cache_lock:
+            cached = _analysis_cache.get(fingerprint)
+
+    if cached is not None:
+        metrics, risk_results, score_result, patterns = copy.deepcopy(cached)
+        ai_explanations = await run_in_threadpool(
+            generate_explanation_cached,
+            metrics,
+            risk_results,
+            score_result,
+            openai_api_key=openai_api_key
+        )
+    else:
+        loop = asyncio.get_running_loop()
+        executor = get_analysis_executor()
+        # Patterns only need the trades, so detection runs in a second worker
+        # alongside the metrics -> rules -> score chain
+        patterns_future = loop.run_in_executor(executor, detect_trade_patterns, df)
+        try:
+            metrics, risk_results, score_result = await loop.run_in_executor(executor, score_trade_data, df)
+        except BaseException:
+            patterns_future.cancel()
+            raise
+
+        # Generate AI explanations using User's Key if provided
+        ai_explanations, patterns = await asyncio.gather(
+            run_in_threadpool(
+                generate_explanation_cached,
+                metrics,
+                risk_results,
+                score_result,
+                openai_api_key=openai_api_key
+            ),
+            patterns_future
+        )
+        if fingerprint is not None:
+            with _analysis_cache_lock:
+                _analysis_cache[fingerprint] = copy.deepcopy((metrics, risk_results, score_result, patterns))
 
     return {
         "metrics": metrics,
-        "risk_results": risk_results,
+        # Merge patterns into risk_results so they are persisted in the same JSON column
+        "risk_results": {**risk_results, "patterns": patterns},
         "score_result": score_result,
         "ai_explanations": ai_explanations
     }
@@ -124,34 +183,46 @@ def process_trade_data(df: pd.DataFrame, openai_api_key: Optional[str] = None):
 
 async def save_analysis_to_db(
     db: AsyncSession,
-    user: Optional[models.User],
+    user: Optional[auth.AuthenticatedUser],
     filename: str,
     original_filename: str,
     file_size: int,
     trade_count: int,
-    results: dict
+    results: dict,
+    analysis_id: Optional[str] = None
 ):
-    """Save analysis results to database (Async)"""
+    """
+    Save analysis results to database (Async).
+    `results` must already be JSON-safe (see make_json_safe); callers convert
+    once and reuse the same dict for the response.
+    """
 
-    safe_results = make_json_safe(results)
+    if analysis_id is not None:
+        # Idempotent: a retried persist for the same id is a no-op
+        existing = await db.get(models.Analysis, analysis_id)
+        if existing is not None:
+            return existing
 
     analysis = models.Analysis(
+        id=analysis_id or str(uuid.uuid4()),
         user_id=user.id if user else None,
         filename=filename,
         original_filename=original_filename,
         file_size=file_size,
         trade_count=trade_count,
-        metrics=safe_results.get("metrics"),
-        risk_results=safe_results.get("risk_results"),
-        score_result=safe_results.get("score_result"),
-        ai_explanations=safe_results.get("ai_explanations"),
+        metrics=results.get("metrics"),
+        risk_results=results.get("risk_results"),
+        score_result=results.get("score_result"),
+        ai_explanations=results.get("ai_explanations"),
+        score=(results.get("score_result") or {}).get("score"),
         status="completed",
         completed_at=datetime.utcnow()
     )
 
     db.add(analysis)
+    # Every column is set client-side and the session does not expire on
+    # commit, so no refresh: re-reading would re-parse the JSON just written
     await db.commit()
-    await db.refresh(analysis)
     return analysis
 
 
@@ -161,6 +232,18 @@ async def save_analysis_to_db(
 
 from api.utils.mt5_parser import parse_mt5_html
 
+# Built once at import; the demo path only needs a copy per request
+SAMPLE_TRADES_DF = pd.DataFrame({
+    "trade_id": [1, 2, 3, 4],
+    "profit_loss": [50, -30, 75, -20],
+    "lot_size": [0.1, 0.2, 0.15, 0.1],
+    "account_balance_before": [10000, 10050, 10020, 10095],
+    "stop_loss": [1.1, 1.2, 1.15, 1.3],
+    "entry_time": pd.to_datetime(["2024-01-01 10:00:00", "2024-01-01 11:00:00", "2024-01-01 12:00:00", "2024-01-01 12:15:00"]),
+    "exit_time": pd.to_datetime(["2024-01-01 11:00:00", "2024-01-01 11:30:00", "2024-01-01 13:00:00", "2024-01-01 12:45:00"])
+})
+SAMPLE_FILE_SIZE = 1024
+
 @router.post("/trades", response_model=schemas.APIResponse)
 async def analyze_trades(
     file: Optional[UploadFile] = File(None),
@@ -174,19 +257,11 @@ async def analyze_trades(
     """
     try:
         if use_sample:
-            sample_data = {
-                "trade_id": [1, 2, 3, 4],
-                "profit_loss": [50, -30, 75, -20],
-                "lot_size": [0.1, 0.2, 0.15, 0.1],
-                "account_balance_before": [10000, 10050, 10020, 10095],
-                "stop_loss": [1.1, 1.2, 1.15, 1.3],
-                "entry_time": ["2024-01-01 10:00:00", "2024-01-01 11:00:00", "2024-01-01 12:00:00", "2024-01-01 12:15:00"],
-                "exit_time": ["2024-01-01 11:00:00", "2024-01-01 11:30:00", "2024-01-01 13:00:00", "2024-01-01 12:45:00"]
-            }
-            df = pd.DataFrame(sample_data)
+            # Analysis stages only mutate the pickled copy in the worker, so a shallow copy suffices
+            df = SAMPLE_TRADES_DF.copy(deep=False)
             filename = "sample_data.csv"
             original_filename = "sample_data.csv"
-            file_size = 1024
+            file_size = SAMPLE_FILE_SIZE
             trade_count = len(df)
 
         else:
@@ -197,64 +272,49 @@ async def analyze_trades(
             if not (filename.endswith(".csv") or filename.endswith(".html") or filename.endswith(".htm")):
                 raise HTTPException(status_code=400, detail="Only CSV and MT5 HTML files are supported")
 
-            # Async read
-            contents = await file.read()
-            
             # Determine processing method
             if filename.endswith(".csv"):
-                # Offload CSV parsing to threadpool
-                def parse_csv(content_bytes):
-                    return pd.read_csv(io.StringIO(content_bytes.decode("utf-8")))
-                
-                df = await run_in_threadpool(parse_csv, contents)
+                # Offload CSV parsing to threadpool, reading the upload stream directly
+                df = await run_in_threadpool(parse_csv_upload, file.file)
+                file.file.seek(0, io.SEEK_END)
+                file_size = file.file.tell()
             else:
                 # MT5 HTML Parsing
+                contents = await file.read()
+                
                 def parse_html_wrapper(content_bytes):
                     return parse_mt5_html(content_bytes)
                 
                 df = await run_in_threadpool(parse_html_wrapper, contents)
+                file_size = len(contents)
             
             filename = file.filename
             original_filename = file.filename
-            file_size = len(contents)
             trade_count = len(df)
 
         # Prepare OpenAI key if available
-        openai_api_key = None
-        if current_user:
-            # We need to fetch the full user settings + decrypted key
-            # Since current_user is from a token dependency, it might not have the settings relation loaded or refreshed
-            # Let's fetch settings explicitly
-            query = select(models.UserSettings).where(models.UserSettings.user_id == current_user.id)
-            settings_res = await db.execute(query)
-            user_settings = settings_res.scalars().first()
-            
-            if user_settings and user_settings.openai_api_key_encrypted:
-                try:
-                    from api.utils.encryption import encryption_service
-                    openai_api_key = encryption_service.decrypt(user_settings.openai_api_key_encrypted)
-                except Exception as e:
-                    print(f"Failed to decrypt user OpenAI key: {e}")
+        openai_api_key = await get_openai_key_for_user(db, current_user.id) if current_user else None
 
-        # Offload heavy calculation to threadpool
-        results = await run_in_threadpool(process_trade_data, df, openai_api_key)
+        results = await process_trade_data(df, openai_api_key)
 
-        # Async save
-        analysis = await save_analysis_to_db(
+        # The id is assigned up front so the stored results and the response share one dict
+        analysis_id = str(uuid.uuid4())
+        response_data = make_json_safe({
+            "analysis_id": analysis_id,
+            **results
+        })
+        # Persisted before responding, so the returned id is always retrievable
+        await save_analysis_to_db(
             db=db,
             user=current_user,
             filename=filename,
             original_filename=original_filename,
             file_size=file_size,
             trade_count=trade_count,
-            results=results
+            results=response_data,
+            analysis_id=analysis_id
         )
 
-        response_data = make_json_safe({
-            "analysis_id": analysis.id,
-            **results
-        })
-
         return schemas.APIResponse.success_response(
             data=response_data,
             message="Analysis completed successfully"
@@ -263,6 +323,7 @@ async def analyze_trades(
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("Trade analysis failed")
         raise HTTPException(
             status_code=500,
             detail=f"Error processing analysis: {str(e)}"
@@ -289,7 +350,8 @@ async def get_analysis(
     if current_user and analysis.user_id and analysis.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    response_data = make_json_safe({
+    # JSON columns come back as plain JSON; the response class encodes the datetimes
+    response_data = {
         "id": analysis.id,
         "status": analysis.status,
         "metrics": analysis.metrics,
@@ -300,7 +362,7 @@ async def get_analysis(
         "completed_at": analysis.completed_at,
         "filename": analysis.original_filename,
         "trade_count": analysis.trade_count
-    })
+    }
 
     return schemas.APIResponse.success_response(data=response_data)
 
@@ -322,61 +384,50 @@ async def list_analyses(
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
 
-    # Async Query with Filters
-    query = select(models.Analysis).where(models.Analysis.user_id == current_user.id)
+    # Only the list columns; the heavy JSON columns are never loaded
+    score_result = models.Analysis.score_result
+    query = select(
+        models.Analysis.id,
+        models.Analysis.original_filename,
+        models.Analysis.trade_count,
+        models.Analysis.score,
+        score_result["grade"].as_string().label("grade"),
+        models.Analysis.created_at,
+        models.Analysis.status
+    ).where(models.Analysis.user_id == current_user.id)
 
     if start_date:
         query = query.where(models.Analysis.created_at >= start_date)
     if end_date:
         query = query.where(models.Analysis.created_at <= end_date)
-    # Check score within JSON column requires casting or simple python filtering.
-    # SQL filtering on JSON is dialect specific (Postgres vs SQLite).
-    # For SQLite, we might fetch and filter in Python if volume is low, or use specific JSON operators.
-    # Given we are using SQLite + aiosqlite, let's filter in python for complex JSON fields if needed,
-    # BUT `score_result` is JSON. Extraction is messy in generic SQLAlchemy.
-    # Recommendation: Add a `score` float column to Analysis model for simpler indexing/querying.
-    # For now, we will FILTER IN PYTHON for min_score or ignore it if efficient paging is needed.
-    
-    query = query.order_by(models.Analysis.created_at.desc())
-    
-    # Execution
-    result = await db.execute(query)
-    all_analyses = result.scalars().all()  # Fetch all for python filtering (warn: scaling issue)
-
-    # In-memory filtering for JSON field score
-    filtered_analyses = []
-    for a in all_analyses:
-        if min_score is not None:
-             score = a.score_result.get("score", 0) if a.score_result else 0
-             if score < min_score:
-                 continue
-        filtered_analyses.append(a)
-
-    total = len(filtered_analyses)
-    
-    # Pagination in Python (post-filter)
-    paginated = filtered_analyses[skip : skip + limit]
+    if min_score is not None:
+        # A missing score counts as 0
+        query = query.where(func.coalesce(models.Analysis.score, 0) >= min_score)
+
+    # Total matching rows, then only the requested page
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
 
-    response_data = make_json_safe({
+    query = query.order_by(models.Analysis.created_at.desc()).offset(skip).limit(limit)
+    rows = (await db.execute(query)).all()
+
+    return schemas.APIResponse.success_response(data={
         "analyses": [
             {
                 "id": a.id,
                 "filename": a.original_filename,
                 "trade_count": a.trade_count,
-                "score": a.score_result.get("score") if a.score_result else None,
-                "grade": a.score_result.get("grade") if a.score_result else None,
+                "score": a.score,
+                "grade": a.grade,
                 "created_at": a.created_at,
                 "status": a.status
             }
-            for a in paginated
+            for a in rows
         ],
         "total": total,
         "skip": skip,
         "limit": limit
     })
 
-    return schemas.APIResponse.success_response(data=response_data)
-
 
 @router.get("/history/trends", response_model=schemas.APIResponse)
 async def get_analysis_trends(
@@ -431,6 +482,7 @@ async def get_analysis_trends(
 @router.post("/quick", response_model=schemas.APIResponse)
 async def quick_analyze(
     request: dict,
+    http_request: Request,
     current_user: Optional[schemas.UserResponse] = Depends(auth.get_optional_user),
     db: AsyncSession = Depends(get_async_db)
 ):
@@ -438,13 +490,16 @@ async def quick_analyze(
     Quick analysis from JSON data
     """
     try:
-        df = pd.DataFrame(request.get("trades", []))
+        df = trades_to_dataframe(request.get("trades", []))
 
         if df.empty:
             raise HTTPException(status_code=400, detail="No trade data provided")
 
-        # Offload calculation
-        results = await run_in_threadpool(process_trade_data, df)
+        results = make_json_safe(await process_trade_data(df))
+
+        # On-wire size of the JSON body; only re-encode if it came without a length
+        content_length = http_request.headers.get("content-length")
+        file_size = int(content_length) if content_length else len(orjson.dumps(request))
 
         # Async save
         analysis = await save_analysis_to_db(
@@ -452,15 +507,15 @@ async def quick_analyze(
             user=current_user,
             filename="quick_analysis.json",
             original_filename="quick_analysis.json",
-            file_size=len(json.dumps(make_json_safe(request))),
+            file_size=file_size,
             trade_count=len(df),
             results=results
         )
 
-        response_data = make_json_safe({
+        response_data = {
             "analysis_id": analysis.id,
             **results
-        })
+        }
 
         return schemas.APIResponse.success_response(
             data=response_data,
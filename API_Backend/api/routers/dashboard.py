@@ -3,7 +3,7 @@ API endpoints for dashboard data
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, cast, extract, true, Integer
 from datetime import datetime, timedelta
 from typing import Optional
 import statistics
@@ -13,6 +13,15 @@ from api.database import get_db
 
 router = APIRouter()
 
+def _iso_week(db: Session, column):
+    """SQL expression for the ISO 8601 week number of a datetime column"""
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite has no ISO week: take the Thursday of the row's (Monday-based)
+        # week, whose day of year always falls in the ISO week's year
+        thursday = func.date(column, "-3 days", "weekday 4")
+        return (cast(func.strftime("%j", thursday), Integer) - 1) // 7 + 1
+    return cast(extract("week", column), Integer)
+
 @router.get("/summary", response_model=schemas.APIResponse)
 async def get_dashboard_summary(
     current_user: schemas.UserResponse = Depends(auth.get_current_active_user),
@@ -27,13 +36,16 @@ async def get_dashboard_summary(
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    # Get user's analyses
-    analyses = db.query(models.Analysis)\
-        .filter(models.Analysis.user_id == current_user.id)\
-        .order_by(desc(models.Analysis.created_at))\
-        .all()
-    
-    if not analyses:
+    user_filter = models.Analysis.user_id == current_user.id
+    score = models.Analysis.score
+
+    # Totals; the average only counts analyses with a non-zero score
+    total_analyses, average_score = db.query(
+        func.count(models.Analysis.id),
+        func.avg(func.nullif(score, 0))
+    ).filter(user_filter).one()
+
+    if not total_analyses:
         response_data = schemas.DashboardSummary(
             total_analyses=0,
             average_score=0,
@@ -42,17 +54,7 @@ async def get_dashboard_summary(
             improvement_trend=[]
         )
         return schemas.APIResponse.success_response(data=response_data)
-    
-    # Calculate statistics
-    total_analyses = len(analyses)
-    
-    # Average score (only from completed analyses with scores)
-    completed_analyses = [a for a in analyses if a.score_result and a.score_result.get("score")]
-    if completed_analyses:
-        average_score = statistics.mean([a.score_result["score"] for a in completed_analyses])
-    else:
-        average_score = 0
-    
+
     # Recent analyses (last 5)
     recent_analyses = [
         schemas.AnalysisResponse(
@@ -65,45 +67,49 @@ async def get_dashboard_summary(
             created_at=a.created_at,
             completed_at=a.completed_at
         )
-        for a in analyses[:5]
+        for a in db.query(models.Analysis)
+            .filter(user_filter)
+            .order_by(desc(models.Analysis.created_at))
+            .limit(5)
     ]
-    
-    # Risk distribution
-    risk_distribution = {"low": 0, "medium": 0, "high": 0}
-    for a in completed_analyses:
-        breakdown = a.score_result.get("risk_breakdown", {})
-        for risk_level, count in breakdown.items():
-            if risk_level in risk_distribution:
-                risk_distribution[risk_level] += count
-    
-    # Improvement trend (last 30 days)
+
+    # Risk distribution, summed from each scored analysis' risk_breakdown
+    risk_levels = ("low", "medium", "high")
+    breakdown_totals = db.query(*[
+        func.coalesce(func.sum(
+            models.Analysis.score_result[("risk_breakdown", level)].as_integer()
+        ), 0)
+        for level in risk_levels
+    ]).filter(user_filter, func.nullif(score, 0).isnot(None)).one()
+    risk_distribution = dict(zip(risk_levels, breakdown_totals))
+
+    # Improvement trend (last 30 days), grouped by ISO week number
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_analyses_30d = [
-        a for a in completed_analyses 
-        if a.created_at >= thirty_days_ago
-    ]
-    
+    week = _iso_week(db, models.Analysis.created_at)
+    weekly_rows = db.query(week, func.avg(score), func.count())\
+        .filter(
+            user_filter,
+            func.nullif(score, 0).isnot(None),
+            models.Analysis.created_at >= thirty_days_ago
+        )\
+        .group_by(week)\
+        .order_by(week)\
+        .all()
+
     improvement_trend = []
-    if len(recent_analyses_30d) > 1:
-        # Group by week
-        weekly_scores = {}
-        for a in recent_analyses_30d:
-            week = a.created_at.isocalendar()[1]  # Week number
-            if week not in weekly_scores:
-                weekly_scores[week] = []
-            weekly_scores[week].append(a.score_result["score"])
-        
-        for week, scores in sorted(weekly_scores.items()):
-            avg_score = statistics.mean(scores)
-            improvement_trend.append({
-                "week": week,
+    if sum(count for _, _, count in weekly_rows) > 1:
+        improvement_trend = [
+            {
+                "week": week_number,
                 "average_score": avg_score,
-                "analysis_count": len(scores)
-            })
-    
+                "analysis_count": count
+            }
+            for week_number, avg_score, count in weekly_rows
+        ]
+
     response_data = schemas.DashboardSummary(
         total_analyses=total_analyses,
-        average_score=round(average_score, 2),
+        average_score=round(average_score or 0, 2),
         recent_analyses=recent_analyses,
         risk_distribution=risk_distribution,
         improvement_trend=improvement_trend
@@ -203,11 +209,12 @@ async def get_insights(
             headers={"WWW-Authenticate": "Bearer"},
         )
     # Get recent analyses
-    analyses = db.query(models.Analysis)\
-        .filter(
-            models.Analysis.user_id == current_user.id,
-            models.Analysis.score_result.isnot(None)
-        )\
+    recent_filter = (
+        models.Analysis.user_id == current_user.id,
+        models.Analysis.score_result.isnot(None)
+    )
+    analyses = db.query(models.Analysis.id, models.Analysis.score_result)\
+        .filter(*recent_filter)\
         .order_by(desc(models.Analysis.created_at))\
         .limit(10)\
         .all()
@@ -220,17 +227,28 @@ async def get_insights(
     
     insights = []
     
-    # Check for consistent issues
-    all_risks = []
-    for analysis in analyses:
-        if analysis.risk_results and analysis.risk_results.get("detected_risks"):
-            all_risks.extend(analysis.risk_results["detected_risks"])
-    
-    from collections import Counter
-    risk_counts = Counter(all_risks)
+    # Check for consistent issues by unnesting detected_risks in the database
+    if db.get_bind().dialect.name == "sqlite":
+        detected = func.json_each(models.Analysis.risk_results, "$.detected_risks")
+    else:
+        detected = func.json_array_elements_text(models.Analysis.risk_results["detected_risks"])
+    detected = detected.table_valued("value")
+    recent_ids = db.query(models.Analysis.id)\
+        .filter(*recent_filter)\
+        .order_by(desc(models.Analysis.created_at))\
+        .limit(10)
+    risk_count = func.count().label("risk_count")
+    risk_counts = db.query(detected.c.value, risk_count)\
+        .select_from(models.Analysis)\
+        .join(detected, true())\
+        .filter(models.Analysis.id.in_(recent_ids.scalar_subquery()))\
+        .group_by(detected.c.value)\
+        .order_by(desc(risk_count), detected.c.value)\
+        .limit(limit)\
+        .all()
     
     # Generate insights based on frequent risks
-    for risk, count in risk_counts.most_common(limit):
+    for risk, count in risk_counts:
         if count >= len(analyses) / 2:  # Appears in at least half of analyses
             risk_names = {
                 "over_leverage": "position sizing",
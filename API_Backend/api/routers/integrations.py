@@ -1,13 +1,19 @@
 """
 API endpoints for Deriv/MT5 integration (Async Optimized)
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc, and_, or_, func, update, delete
+from sqlalchemy import desc, and_, or_, func, update, delete, table, column, case, type_coerce, DateTime, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 import asyncio
+import logging
+import uuid
+
+import orjson
 
 from api import schemas
 from api.database import get_async_db, AsyncSessionLocal
@@ -15,21 +21,81 @@ from api.auth import get_current_active_user
 from api.models import User, Analysis
 from api.models.integration_models import DerivConnection, DerivTrade, SyncLog, WebhookEvent
 from api.utils.encryption import encryption_service
-from api.utils.deriv_client import DerivAPIClient
+from api.utils.deriv_client import DerivAPIClient, DerivAuthError, get_client_for_connection, invalidate_client
 from api.schemas.integrations import (
     DerivConnectRequest, ConnectionStatusResponse, SyncResultResponse,
-    ConnectionResponse, SyncTradesRequest, UpdateConnectionRequest,
-    WebhookEventRequest, WebhookResponse, ConnectionStats
+    ConnectionResponse, OwnerConnectionResponse, SyncTradesRequest, UpdateConnectionRequest,
+    WebhookEventRequest, WebhookResponse, ConnectionStats, DerivTradeResponse, SyncLogResponse
 )
-from core.metrics_calculator import TradeMetricsCalculator
-from core.risk_rules import RiskRuleEngine
-from core.risk_scorer import RiskScorer
-from core.ai_explainer import AIRiskExplainer
-from core.pattern_recognition import PatternDetector
-from core.news_service import NewsService
+from core.ai_explainer import generate_explanation_cached
+from core.analysis_pipeline import get_analysis_executor, score_trade_data, detect_trade_patterns
+
+logger = logging.getLogger("api")
 
 router = APIRouter()
 
+# Trade columns written by a sync, with the value used when Deriv omits one
+DERIV_TRADE_DEFAULTS = {
+    "transaction_id": None,
+    "contract_id": None,
+    "symbol": "",
+    "contract_type": "",
+    "currency": "USD",
+    "buy_price": 0,
+    "sell_price": None,
+    "barrier": None,
+    "barrier2": None,
+    "stake": 0,
+    "payout": None,
+    "profit": 0,
+    "purchase_time": None,
+    "expiry_time": None,
+    "sell_time": None,
+    "duration": None,
+    "status": "unknown",
+    "exit_spot": None,
+    "raw_data": None,
+}
+# Rows per INSERT statement; keeps the bind parameter count well under SQLite's limit
+TRADE_UPSERT_BATCH_SIZE = 500
+# Above this many trades, PostgreSQL syncs stage rows with COPY before upserting
+TRADE_COPY_THRESHOLD = 1000
+# Sync log columns update_sync_log accepts from a sync's stats
+SYNC_LOG_STAT_FIELDS = frozenset({
+    "trades_fetched", "trades_new", "trades_updated", "trades_skipped", "analysis_id", "error_message"
+})
+# Connection settings a user may change through the update endpoint
+CONNECTION_UPDATE_FIELDS = frozenset({"connection_name", "auto_sync", "sync_frequency", "sync_days_back"})
+# Connections that synced successfully within this window skip the pre-sync connection test
+CONNECTION_TEST_INTERVAL = timedelta(hours=1)
+# Incremental syncs re-fetch this far before the last successful sync to catch late-settled contracts
+INCREMENTAL_SYNC_OVERLAP = timedelta(minutes=15)
+# Sync workers per process (syncs running at once); kept below the async engine's pool size
+MAX_CONCURRENT_SYNCS = 8
+# Waiting syncs per process before new sync requests get a 429 (the queue is
+# per web worker, so the limit is too)
+MAX_QUEUED_SYNCS = 64
+# A sync claims its connection in the database (last_sync_status "syncing"),
+# so web workers never sync the same connection at once. Claims older than
+# this are treated as abandoned by a worker that died mid-sync.
+SYNC_CLAIM_TIMEOUT = timedelta(minutes=30)
+# The queue holds connection IDs (None stops a worker). Within a process each
+# connection has at most one job waiting, [days_back, force_full_sync,
+# analyze_after_sync] in _queued_syncs, and at most one sync running; a job
+# requested while it runs waits in _followup_syncs and runs right after it.
+_sync_queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=MAX_QUEUED_SYNCS)
+_queued_syncs: Dict[str, List[Any]] = {}
+_followup_syncs: Dict[str, List[Any]] = {}
+_running_syncs: Set[str] = set()
+_sync_workers: List[asyncio.Task] = []
+# Webhook events are queued and written in batches of up to this many rows,
+# at most WEBHOOK_FLUSH_INTERVAL seconds after the first event of a batch
+WEBHOOK_BATCH_SIZE = 500
+WEBHOOK_FLUSH_INTERVAL = 0.2
+WEBHOOK_QUEUE_SIZE = 10000
+_webhook_queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=WEBHOOK_QUEUE_SIZE)
+_webhook_writer: Optional[asyncio.Task] = None
+
 # Helper functions
 async def get_deriv_connection(db: AsyncSession, connection_id: str, user_id: str) -> DerivConnection:
     """Get Deriv connection with authorization check"""
@@ -45,6 +111,38 @@ async def get_deriv_connection(db: AsyncSession, connection_id: str, user_id: st
     
     return connection
 
+SYNC_FREQUENCY_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+}
+
+def response_columns(model, schema) -> list:
+    """
+    Columns of `model` backing the fields of response `schema`, so read
+    endpoints can select plain rows instead of hydrating ORM instances
+    """
+    table_columns = model.__table__.columns
+    return [getattr(model, name) for name in schema.model_fields if name in table_columns]
+
+def next_sync_expression(dialect_name: str):
+    """SQL expression for when an auto-synced connection is next due (NULL if not scheduled)"""
+    def shifted(interval: timedelta):
+        if dialect_name == "sqlite":
+            return type_coerce(
+                func.datetime(DerivConnection.last_sync_at, f"+{int(interval.total_seconds())} seconds"),
+                DateTime
+            )
+        return DerivConnection.last_sync_at + interval
+    
+    return case(
+        *[
+            (and_(DerivConnection.auto_sync == True, DerivConnection.sync_frequency == frequency), shifted(interval))
+            for frequency, interval in SYNC_FREQUENCY_INTERVALS.items()
+        ],
+        else_=None
+    )
+
 async def create_sync_log(db: AsyncSession, connection_id: str, sync_type: str, status: str = "started") -> SyncLog:
     """Create a new sync log entry"""
     sync_log = SyncLog(
@@ -58,158 +156,239 @@ async def create_sync_log(db: AsyncSession, connection_id: str, sync_type: str,
     return sync_log
 
 async def update_sync_log(db: AsyncSession, sync_log_id: str, status: str, stats: Dict[str, Any] = None):
-    """Update sync log with results"""
-    # We fetch it again to ensure it's attached to the current session if needed, 
-    # or simple update. Since this is often called in a different scope, let's just update by ID.
+    """Update sync log with results in a single UPDATE. Does not commit."""
+    now = datetime.utcnow()
+    # Duration is computed from started_at by the database
+    if db.get_bind().dialect.name == "sqlite":
+        duration = (func.julianday(now) - func.julianday(SyncLog.started_at)) * 86400.0
+    else:
+        duration = func.extract("epoch", now - SyncLog.started_at)
     
     values = {
         "status": status,
-        "completed_at": datetime.utcnow()
+        "completed_at": now,
+        "duration_seconds": duration
     }
-    
     if stats:
-        for key, value in stats.items():
-            values[key] = value
-
-    # We need to calculate duration. Complex to do in one update if we need to read start_time.
-    # Let's fetch, update, commit.
-    query = select(SyncLog).where(SyncLog.id == sync_log_id)
-    result = await db.execute(query)
-    sync_log = result.scalars().first()
+        values.update({key: value for key, value in stats.items() if key in SYNC_LOG_STAT_FIELDS})
     
-    if sync_log:
-        sync_log.status = status
-        sync_log.completed_at = datetime.utcnow()
-        if stats:
-             for key, value in stats.items():
-                if hasattr(sync_log, key):
-                    setattr(sync_log, key, value)
-        
-        if sync_log.started_at:
-            sync_log.duration_seconds = (sync_log.completed_at - sync_log.started_at).total_seconds()
-        
-        await db.commit()
+    await db.execute(
+        update(SyncLog)
+        .where(SyncLog.id == sync_log_id)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+async def upsert_deriv_trades(db: AsyncSession, connection_id: str, trades: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Insert or update fetched trades with INSERT ... ON CONFLICT on
+    (connection_id, deriv_trade_id), one statement per batch.
+    Returns (new_trades, updated_trades). Does not commit.
+    """
+    # Last occurrence wins, as it would with row-by-row updates
+    trades_by_id = {trade_data["deriv_trade_id"]: trade_data for trade_data in trades}
+    if not trades_by_id:
+        return 0, 0
+
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    # Existing rows only get the fields Deriv actually sent
+    sent_fields = set().union(*trades_by_id.values())
+    update_columns = [name for name in DERIV_TRADE_DEFAULTS if name in sent_fields]
+
+    # PostgreSQL reports insert vs update from the upsert itself (xmax is 0 for
+    # freshly inserted rows); elsewhere prefetch which trades are already stored
+    # in one query, passing the IDs as a single JSON array parameter
+    existing_ids = set()
+    if insert is not pg_insert:
+        fetched_ids = func.json_each(orjson.dumps(list(trades_by_id)).decode()).table_valued("value")
+        result = await db.execute(
+            select(DerivTrade.deriv_trade_id).where(
+                DerivTrade.connection_id == connection_id,
+                DerivTrade.deriv_trade_id.in_(select(fetched_ids.c.value))
+            )
+        )
+        existing_ids.update(result.scalars())
+
+    rows = [
+        {
+            "connection_id": connection_id,
+            "deriv_trade_id": deriv_trade_id,
+            **{name: trade_data.get(name, default) for name, default in DERIV_TRADE_DEFAULTS.items()}
+        }
+        for deriv_trade_id, trade_data in trades_by_id.items()
+    ]
+    if insert is pg_insert and len(rows) > TRADE_COPY_THRESHOLD:
+        new_trades = await copy_upsert_deriv_trades(db, rows, update_columns)
+        return new_trades, len(rows) - new_trades
+
+    new_trades = 0 if insert is pg_insert else len(rows) - len(existing_ids)
+    for start in range(0, len(rows), TRADE_UPSERT_BATCH_SIZE):
+        stmt = insert(DerivTrade).values(rows[start:start + TRADE_UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["connection_id", "deriv_trade_id"],
+            set_={
+                **{name: stmt.excluded[name] for name in update_columns},
+                "updated_at": datetime.utcnow()
+            }
+        )
+        if insert is pg_insert:
+            result = await db.execute(stmt.returning(literal_column("xmax = 0")))
+            new_trades += sum(result.scalars())
+        else:
+            await db.execute(stmt)
+
+    return new_trades, len(rows) - new_trades
+
+async def copy_upsert_deriv_trades(db: AsyncSession, rows: List[Dict[str, Any]], update_columns: List[str]) -> int:
+    """
+    PostgreSQL bulk path: COPY the rows into a transaction-scoped staging
+    table, then merge them with a single INSERT ... SELECT ... ON CONFLICT.
+    Runs on the session's own connection, so it commits with the session.
+    Returns how many rows were newly inserted.
+    """
+    now = datetime.utcnow()
+    copied_columns = ["deriv_trade_id", *DERIV_TRADE_DEFAULTS]
+    columns = ["id", "connection_id", *copied_columns, "commission", "created_at", "updated_at"]
+    connection_uuid = uuid.UUID(str(rows[0]["connection_id"]))
+    # COPY bypasses SQLAlchemy types: apply the Python-side defaults here and send JSON as text
+    records = [
+        (
+            uuid.uuid4(),
+            connection_uuid,
+            *(
+                orjson.dumps(row[name], default=str).decode()
+                if name == "raw_data" and row[name] is not None else row[name]
+                for name in copied_columns
+            ),
+            0,
+            now,
+            now
+        )
+        for row in rows
+    ]
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    await driver_connection.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS deriv_trades_stage "
+        "(LIKE deriv_trades INCLUDING DEFAULTS) ON COMMIT DROP"
+    )
+    await driver_connection.copy_records_to_table("deriv_trades_stage", records=records, columns=columns)
+
+    stage = table("deriv_trades_stage", *[column(name) for name in columns])
+    stmt = pg_insert(DerivTrade).from_select(columns, select(*[stage.c[name] for name in columns]))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["connection_id", "deriv_trade_id"],
+        set_={
+            **{name: stmt.excluded[name] for name in update_columns},
+            "updated_at": now
+        }
+    )
+    result = await db.execute(stmt.returning(literal_column("xmax = 0")))
+    return sum(result.scalars())
 
 async def analyze_synced_trades(db: AsyncSession, connection: DerivConnection, sync_log: SyncLog) -> Optional[Dict[str, Any]]:
-    """Analyze synced trades and create analysis"""
+    """
+    Analyze synced trades and create analysis. Writes run in a savepoint so a
+    failed analysis doesn't undo the sync; the caller commits.
+    """
     try:
-        # Get recent trades from this connection
-        query = select(DerivTrade).where(
+        # Get recent trades from this connection (only the columns analysis needs)
+        query = select(
+            DerivTrade.id,
+            DerivTrade.symbol,
+            DerivTrade.profit,
+            DerivTrade.stake,
+            DerivTrade.purchase_time,
+            DerivTrade.sell_time,
+            DerivTrade.expiry_time
+        ).where(
             DerivTrade.connection_id == connection.id
         ).order_by(DerivTrade.purchase_time)
         
         result = await db.execute(query)
-        trades = result.scalars().all()
+        rows = result.all()
         
-        if not trades:
+        if not rows:
             return None
         
-        # Convert to DataFrame-like format for analysis
-        trades_data = []
-        for trade in trades:
-            trades_data.append({
-                "trade_id": trade.id,
-                "symbol": trade.symbol,
-                "profit_loss": trade.profit,
-                "lot_size": trade.stake / 100,  # Approximate lot size
-                "account_balance_before": 10000,  # Default, should be calculated
-                "stop_loss": None,  # Deriv doesn't have stop loss in same way
-                "entry_time": trade.purchase_time,
-                "exit_time": trade.sell_time or trade.expiry_time or trade.purchase_time,
-                "trade_type": "BUY" if trade.profit >= 0 else "SELL"  # Simplified
-            })
-        
         # Import pandas locally
+        import numpy as np
         import pandas as pd
-        df = pd.DataFrame(trades_data)
-        
-        # Calculate metrics
-        calculator = TradeMetricsCalculator(df)
-        metrics = calculator.compute_all_metrics()
-        
-        # Detect risks
-        risk_engine = RiskRuleEngine(metrics, df)
-        risk_results = risk_engine.detect_all_risks()
+        raw = pd.DataFrame.from_records(
+            rows,
+            columns=["trade_id", "symbol", "profit_loss", "stake", "purchase_time", "sell_time", "expiry_time"]
+        )
         
-        # Detect Event Trading Risks (Phase 3)
+        # Convert to the trade format the analysis expects
+        df = pd.DataFrame({
+            "trade_id": raw["trade_id"],
+            "symbol": raw["symbol"],
+            "profit_loss": raw["profit_loss"],
+            "lot_size": raw["stake"] / 100,  # Approximate lot size
+            "account_balance_before": 10000,  # Default, should be calculated
+            "stop_loss": None,  # Deriv doesn't have stop loss in same way
+            "entry_time": raw["purchase_time"],
+            "exit_time": pd.to_datetime(
+                raw["sell_time"].fillna(raw["expiry_time"]).fillna(raw["purchase_time"])
+            ),
+            "trade_type": np.where(raw["profit_loss"] >= 0, "BUY", "SELL")  # Simplified
+        })
+        
+        # Scoring and pattern detection run concurrently in the analysis process
+        # pool, keeping the event loop free for other requests while they run
+        loop = asyncio.get_running_loop()
+        executor = get_analysis_executor()
+        patterns_future = loop.run_in_executor(executor, detect_trade_patterns, df)
         try:
-            news_service = NewsService()
-            event_risks = []
-            if 'entry_time' in df.columns:
-                # Ensure safe datetime conversion
-                times = pd.to_datetime(df['entry_time'], errors='coerce').dropna()
-                for t in times:
-                    risk = news_service.check_event_trading_risk(t)
-                    if risk:
-                        event_risks.append(risk)
-            
-            if event_risks:
-                if "risk_details" not in risk_results:
-                    risk_results["risk_details"] = {}
-                    
-                risk_results["risk_details"]["event_trading"] = {
-                    "name": "News Event Trading",
-                    "severity": 85,
-                    "description": f"Detected {len(event_risks)} trades executed during high-impact news events.",
-                    "occurrences": len(event_risks)
-                }
-        except Exception as e:
-            print(f"News risk detection failed for sync: {e}")
-
-        # Detect patterns (Phase 2)
-        try:
-            pattern_detector = PatternDetector(df)
-            patterns = pattern_detector.detect_all_patterns()
-            risk_results["patterns"] = patterns
-        except Exception as e:
-            print(f"Pattern detection failed for sync: {e}")
-            risk_results["patterns"] = []
-        
-        # Calculate score
-        scorer = RiskScorer()
-        score_result = scorer.calculate_score(risk_results['risk_details'])
-        
-        # Generate AI explanations
-        ai_explainer = AIRiskExplainer()
-        ai_explanations = ai_explainer.generate_explanation(
-            metrics, 
-            risk_results, 
-            score_result
+            metrics, risk_results, score_result = await loop.run_in_executor(executor, score_trade_data, df)
+        except BaseException:
+            patterns_future.cancel()
+            raise
+        
+        # Generate AI explanations (threadpool) while pattern detection finishes
+        ai_explanations, patterns = await asyncio.gather(
+            asyncio.to_thread(generate_explanation_cached, metrics, risk_results, score_result),
+            patterns_future
         )
+        risk_results["patterns"] = patterns
         
         # Create analysis record
         analysis = Analysis(
             user_id=connection.user_id,
             filename=f"deriv_sync_{connection.id}",
             original_filename=f"Deriv Account {connection.account_id}",
-            file_size=len(trades_data) * 100,  # Approximate
-            trade_count=len(trades),
+            file_size=len(df) * 100,  # Approximate
+            trade_count=len(df),
             metrics=metrics,
             risk_results=risk_results,
             score_result=score_result,
             ai_explanations=ai_explanations,
+            score=score_result.get("score"),
             status="completed",
             completed_at=datetime.utcnow()
         )
         
-        db.add(analysis)
-        await db.commit()
-        await db.refresh(analysis)
-        
-        # Link trades to analysis (Bulk Update would be better but simple loop is fine for <1000 items)
-        for trade in trades:
-            trade.analysis_id = analysis.id
-        
-        # Link sync log to analysis
-        sync_log.analysis_id = analysis.id
-        
-        await db.commit()
+        async with db.begin_nested():
+            db.add(analysis)
+            await db.flush()
+            
+            # Link trades to analysis
+            await db.execute(
+                update(DerivTrade)
+                .where(DerivTrade.connection_id == connection.id)
+                .values(analysis_id=analysis.id)
+            )
+            
+            # Link sync log to analysis
+            sync_log.analysis_id = analysis.id
         
         return {
             "analysis_id": analysis.id,
             "score": score_result.get("score"),
             "grade": score_result.get("grade"),
-            "trade_count": len(trades)
+            "trade_count": len(df)
         }
         
     except Exception as e:
@@ -234,94 +413,71 @@ async def sync_trades_background_task(
             print(f"Connection {connection_id} not found in background task")
             return
 
+        if not await claim_connection_sync(db, connection.id):
+            logger.warning("Skipped sync of connection %s: another worker is syncing it", connection_id)
+            return
+
+        # Committed up front so the log survives a rolled-back sync
         sync_log = await create_sync_log(db, connection.id, "manual" if force_full_sync else "incremental")
+        sync_log_id = sync_log.id
         
         try:
-            # Decrypt API token
-            api_token = encryption_service.decrypt(connection.api_token_encrypted)
-            if not api_token:
+            # Reuse the cached client (decrypted token) for this connection
+            client = get_client_for_connection(connection)
+            if client is None:
                 raise Exception("Failed to decrypt API token")
             
-            # Create Deriv client
-            client = DerivAPIClient(
-                api_token=api_token,
-                app_id=connection.app_id,
-                account_id=connection.account_id
-            )
-            
-            # Test connection first (Async)
-            test_result = await client.test_connection() 
-            if not test_result.get("success"):
-                raise Exception(f"Connection test failed: {test_result.get('error')}")
+            now = datetime.utcnow()
+            update_map = {
+                DerivConnection.connection_status: "connected",
+                DerivConnection.last_sync_at: now,
+                DerivConnection.last_successful_sync: now,
+                DerivConnection.last_sync_status: "success",
+                DerivConnection.total_syncs: DerivConnection.total_syncs + 1,
+                DerivConnection.error_count: 0,
+                DerivConnection.last_error: None,
+            }
             
-            # Get account info
-            account_info = test_result.get("account_info", {})
-            connection.account_info = account_info
-            connection.connection_status = "connected"
+            # Test connection and refresh account info, unless it recently synced fine
+            last_success = connection.last_successful_sync
+            if (
+                force_full_sync
+                or connection.connection_status != "connected"
+                or last_success is None
+                or datetime.utcnow() - last_success > CONNECTION_TEST_INTERVAL
+            ):
+                test_result = await client.test_connection() 
+                if not test_result.get("success"):
+                    invalidate_client(connection.id)
+                    raise Exception(f"Connection test failed: {test_result.get('error')}")
+                
+                # Get account info
+                update_map[DerivConnection.account_info] = test_result.get("account_info", {})
             
-            # Get trades from Deriv (Async)
-            trades = await client.get_trades(days_back)
+            # Get trades from Deriv (Async); auth errors surface here when the test was skipped.
+            # Incremental syncs only fetch what settled since the last successful sync; a
+            # failed fetch raises, so last_successful_sync stays put and the window is retried.
+            try:
+                if force_full_sync or last_success is None:
+                    trades = await client.get_trades(days_back)
+                else:
+                    trades = await client.get_trades_since(last_success - INCREMENTAL_SYNC_OVERLAP)
+            except DerivAuthError:
+                invalidate_client(connection.id)
+                raise
             
             # Process trades
-            new_trades = 0
-            updated_trades = 0
+            new_trades, updated_trades = await upsert_deriv_trades(db, connection.id, trades)
             skipped_trades = 0
             
-            for trade_data in trades:
-                # Check if trade already exists
-                existing_query = select(DerivTrade).where(
-                    DerivTrade.deriv_trade_id == trade_data["deriv_trade_id"],
-                    DerivTrade.connection_id == connection.id
-                )
-                existing_result = await db.execute(existing_query)
-                existing_trade = existing_result.scalars().first()
-                
-                if existing_trade:
-                    # Update existing trade
-                    for key, value in trade_data.items():
-                        if hasattr(existing_trade, key) and key not in ["id", "created_at"]:
-                            setattr(existing_trade, key, value)
-                    updated_trades += 1
-                else:
-                    # Create new trade
-                    trade = DerivTrade(
-                        connection_id=connection.id,
-                        deriv_trade_id=trade_data["deriv_trade_id"],
-                        transaction_id=trade_data.get("transaction_id"),
-                        contract_id=trade_data.get("contract_id"),
-                        symbol=trade_data.get("symbol", ""),
-                        contract_type=trade_data.get("contract_type", ""),
-                        currency=trade_data.get("currency", "USD"),
-                        buy_price=trade_data.get("buy_price", 0),
-                        sell_price=trade_data.get("sell_price"),
-                        barrier=trade_data.get("barrier"),
-                        barrier2=trade_data.get("barrier2"),
-                        stake=trade_data.get("stake", 0),
-                        payout=trade_data.get("payout"),
-                        profit=trade_data.get("profit", 0),
-                        purchase_time=trade_data.get("purchase_time"),
-                        expiry_time=trade_data.get("expiry_time"),
-                        sell_time=trade_data.get("sell_time"),
-                        duration=trade_data.get("duration"),
-                        status=trade_data.get("status", "unknown"),
-                        exit_spot=trade_data.get("exit_spot"),
-                        raw_data=trade_data.get("raw_data")
-                    )
-                    db.add(trade)
-                    new_trades += 1
-            
-            await db.commit()
-            
-            # Update connection stats
-            connection.last_sync_at = datetime.utcnow()
-            connection.last_successful_sync = datetime.utcnow()
-            connection.last_sync_status = "success"
-            connection.total_syncs += 1
-            connection.total_trades_synced += new_trades
-            connection.error_count = 0
-            connection.last_error = None
-            
-            await db.commit()
+            # Update connection stats atomically
+            update_map[DerivConnection.total_trades_synced] = DerivConnection.total_trades_synced + new_trades
+            await db.execute(
+                update(DerivConnection)
+                .where(DerivConnection.id == connection.id)
+                .values(update_map)
+                .execution_options(synchronize_session=False)
+            )
             
             # Run analysis if requested and we have new trades
             analysis_id = None
@@ -334,7 +490,7 @@ async def sync_trades_background_task(
             # Update sync log with success
             await update_sync_log(
                 db=db,
-                sync_log_id=sync_log.id,
+                sync_log_id=sync_log_id,
                 status="success",
                 stats={
                     "trades_fetched": len(trades),
@@ -345,17 +501,30 @@ async def sync_trades_background_task(
                 }
             )
             
+            # Trades, connection stats, analysis and log land in one commit
+            await db.commit()
+            
         except Exception as e:
+            # Discard the partial sync; ORM state is expired, so use the saved IDs
+            await db.rollback()
+            
             # Update connection with error
-            connection.connection_status = "error"
-            connection.last_sync_status = "failed"
-            connection.last_error = str(e)
-            connection.error_count += 1
+            await db.execute(
+                update(DerivConnection)
+                .where(DerivConnection.id == connection_id)
+                .values({
+                    DerivConnection.connection_status: "error",
+                    DerivConnection.last_sync_status: "failed",
+                    DerivConnection.last_error: str(e),
+                    DerivConnection.error_count: DerivConnection.error_count + 1,
+                })
+                .execution_options(synchronize_session=False)
+            )
             
             # Update sync log with failure
             await update_sync_log(
                 db=db,
-                sync_log_id=sync_log.id,
+                sync_log_id=sync_log_id,
                 status="failed",
                 stats={
                     "error_message": str(e)
@@ -364,11 +533,132 @@ async def sync_trades_background_task(
             
             await db.commit()
 
+async def sync_worker_task():
+    """
+    Run queued syncs one at a time until a None sentinel arrives, each
+    followed by any follow-up requested for its connection meanwhile. Syncs
+    run on these long-lived workers rather than as per-request background
+    tasks, so at most MAX_CONCURRENT_SYNCS run at once. This is an in-process
+    asyncio queue, not an external job queue: jobs are lost on restart, and
+    the syncs still share the event loop with request handling, which only
+    stays responsive because their CPU-bound analysis runs in the process pool.
+    """
+    while True:
+        connection_id = await _sync_queue.get()
+        if connection_id is None:
+            return
+        job = _queued_syncs.pop(connection_id)
+        _running_syncs.add(connection_id)
+        try:
+            while job is not None:
+                days_back, force_full_sync, analyze_after_sync = job
+                try:
+                    await sync_trades_background_task(
+                        connection_id=connection_id,
+                        days_back=days_back,
+                        force_full_sync=force_full_sync,
+                        analyze_after_sync=analyze_after_sync
+                    )
+                except Exception as e:
+                    print(f"Background sync failed for connection {connection_id}: {e}")
+                job = _followup_syncs.pop(connection_id, None)
+        finally:
+            _running_syncs.discard(connection_id)
+
+async def claim_connection_sync(db: AsyncSession, connection_id: str) -> bool:
+    """
+    Mark a connection as syncing unless another sync (in any web worker)
+    holds a live claim. Commits; the sync's final status releases the claim.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(DerivConnection)
+        .where(
+            DerivConnection.id == connection_id,
+            or_(
+                DerivConnection.last_sync_status.is_(None),
+                DerivConnection.last_sync_status != "syncing",
+                DerivConnection.last_sync_at < now - SYNC_CLAIM_TIMEOUT
+            )
+        )
+        .values({DerivConnection.last_sync_status: "syncing", DerivConnection.last_sync_at: now})
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+def is_syncing_elsewhere(connection: DerivConnection) -> bool:
+    """True if another web worker holds a live sync claim on this connection"""
+    return (
+        connection.last_sync_status == "syncing"
+        and connection.last_sync_at is not None
+        and datetime.utcnow() - connection.last_sync_at < SYNC_CLAIM_TIMEOUT
+        and connection.id not in _running_syncs
+        and connection.id not in _queued_syncs
+    )
+
+def _merge_sync_jobs(job: Optional[List[Any]], days_back: int, force_full_sync: bool, analyze_after_sync: bool) -> List[Any]:
+    if job is None:
+        return [days_back, force_full_sync, analyze_after_sync]
+    return [max(job[0], days_back), job[1] or force_full_sync, job[2] or analyze_after_sync]
+
+def enqueue_syncs(jobs: List[Tuple[str, int, bool, bool]]) -> bool:
+    """
+    Queue sync jobs for the workers, all or none; False if the queue lacks room.
+    A job for a connection that is already waiting is merged into that job
+    (widest days_back, either flag set). One for a connection that is syncing
+    right now is merged into a follow-up that runs once that sync finishes,
+    so trades settled after it started are still fetched.
+    """
+    merged: Dict[str, List[Any]] = {}
+    followups: Dict[str, List[Any]] = {}
+    for connection_id, *job in jobs:
+        if connection_id in _running_syncs:
+            followups[connection_id] = _merge_sync_jobs(
+                followups.get(connection_id) or _followup_syncs.get(connection_id), *job
+            )
+        else:
+            merged[connection_id] = _merge_sync_jobs(
+                merged.get(connection_id) or _queued_syncs.get(connection_id), *job
+            )
+
+    new_connection_ids = [connection_id for connection_id in merged if connection_id not in _queued_syncs]
+    if _sync_queue.maxsize - _sync_queue.qsize() < len(new_connection_ids):
+        return False
+    _queued_syncs.update(merged)
+    _followup_syncs.update(followups)
+    for connection_id in new_connection_ids:
+        _sync_queue.put_nowait(connection_id)
+    return True
+
+def start_sync_workers():
+    """Start the sync workers (called on app startup)"""
+    global _sync_workers
+    _sync_workers = [task for task in _sync_workers if not task.done()]
+    for _ in range(MAX_CONCURRENT_SYNCS - len(_sync_workers)):
+        _sync_workers.append(asyncio.create_task(sync_worker_task()))
+
+async def stop_sync_workers():
+    """
+    Stop the sync workers (called on app shutdown). Running syncs are
+    cancelled and roll back; queued ones are dropped, as they would be
+    with in-request background tasks.
+    """
+    global _sync_workers
+    for task in _sync_workers:
+        task.cancel()
+    await asyncio.gather(*_sync_workers, return_exceptions=True)
+    _sync_workers = []
+    while not _sync_queue.empty():
+        _sync_queue.get_nowait()
+    _queued_syncs.clear()
+    _followup_syncs.clear()
+    _running_syncs.clear()
+
 # API Endpoints
 @router.post("/deriv/connect", response_model=schemas.APIResponse)
 async def connect_deriv_account(
     request: DerivConnectRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_async_db)
 ):
@@ -382,28 +672,32 @@ async def connect_deriv_account(
         )
     try:
         # Check if connection already exists for this account
-        query = select(DerivConnection).where(
-            DerivConnection.user_id == current_user.id,
-            DerivConnection.app_id == request.app_id,
-            DerivConnection.account_id == request.account_id
+        query = select(
+            select(DerivConnection.id).where(
+                DerivConnection.user_id == current_user.id,
+                DerivConnection.app_id == request.app_id,
+                DerivConnection.account_id == request.account_id
+            ).exists()
         )
-        result = await db.execute(query)
-        existing = result.scalars().first()
         
-        if existing:
-            raise HTTPException(
-                status_code=400,
-                detail="Account already connected"
-            )
-        
-        # Test the connection first (Async)
+        # Test the connection (Async) while the duplicate check runs
         client = DerivAPIClient(
             api_token=request.api_token,
             app_id=request.app_id,
             account_id=request.account_id
         )
         
-        test_result = await client.test_connection()
+        already_connected, test_result = await asyncio.gather(
+            db.scalar(query),
+            client.test_connection()
+        )
+        
+        if already_connected:
+            raise HTTPException(
+                status_code=400,
+                detail="Account already connected"
+            )
+        
         if not test_result.get("success"):
             raise HTTPException(
                 status_code=400,
@@ -437,22 +731,20 @@ async def connect_deriv_account(
         await db.commit()
         await db.refresh(connection)
         
-        # Start initial sync in background
+        # Queue the initial sync for the sync workers
+        message = "Deriv account connected successfully."
         if request.auto_sync:
-            background_tasks.add_task(
-                sync_trades_background_task,
-                connection_id=connection.id,
-                days_back=request.sync_days_back,
-                force_full_sync=True,
-                analyze_after_sync=True
-            )
+            if enqueue_syncs([(connection.id, request.sync_days_back, True, True)]):
+                message += " Initial sync started in background."
+            else:
+                message += " Sync queue is full, please start the initial sync shortly."
         
         return schemas.APIResponse.success_response(
             data={
-                "connection": connection.to_dict(),
+                "connection": ConnectionResponse.model_validate(connection),
                 "test_result": test_result
             },
-            message="Deriv account connected successfully. Initial sync started in background."
+            message=message
         )
         
     except HTTPException:
@@ -466,7 +758,6 @@ async def connect_deriv_account(
 @router.post("/deriv/sync", response_model=schemas.APIResponse)
 async def sync_deriv_trades(
     request: SyncTradesRequest,
-    background_tasks: BackgroundTasks,
     connection_id: Optional[str] = Query(None, description="Specific connection ID (optional)"),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_async_db)
@@ -496,24 +787,32 @@ async def sync_deriv_trades(
                 detail="No connected Deriv accounts found"
             )
         
-        # Start background sync for each connection
-        for connection in connections:
-            days_back = request.days_back or connection.sync_days_back
-            
-            background_tasks.add_task(
-                sync_trades_background_task,
-                connection_id=connection.id,
-                days_back=days_back,
-                force_full_sync=request.force_full_sync,
-                analyze_after_sync=request.analyze_after_sync
+        # Another web worker's running sync can't take a follow-up from this
+        # process, so those connections are reported back instead of queued
+        busy = [c for c in connections if is_syncing_elsewhere(c)]
+        to_sync = [c for c in connections if not is_syncing_elsewhere(c)]
+        
+        # The sync workers pick these up and run them concurrently
+        jobs = [
+            (connection.id, request.days_back or connection.sync_days_back, request.force_full_sync, request.analyze_after_sync)
+            for connection in to_sync
+        ]
+        if not enqueue_syncs(jobs):
+            raise HTTPException(
+                status_code=429,
+                detail="Too many syncs in progress, please try again shortly"
             )
         
+        message = f"Started sync for {len(to_sync)} connection(s)"
+        if busy:
+            message += f"; {len(busy)} already syncing, try again once it finishes"
         return schemas.APIResponse.success_response(
             data={
-                "connections_syncing": [c.id for c in connections],
+                "connections_syncing": [c.id for c in to_sync],
+                "connections_already_syncing": [c.id for c in busy],
                 "total_connections": len(connections)
             },
-            message=f"Started sync for {len(connections)} connection(s)"
+            message=message
         )
         
     except HTTPException:
@@ -538,35 +837,40 @@ async def get_deriv_status(
     try:
         if connection_id:
             connection = await get_deriv_connection(db, connection_id, current_user.id)
-            connections = [connection]
+            filters = [DerivConnection.id == connection.id]
         else:
-            query = select(DerivConnection).where(DerivConnection.user_id == current_user.id)
-            result = await db.execute(query)
-            connections = result.scalars().all()
+            filters = [DerivConnection.user_id == current_user.id]
+        
+        # next_sync is computed by the database alongside each connection
+        query = select(
+            *response_columns(DerivConnection, ConnectionResponse),
+            next_sync_expression(db.get_bind().dialect.name).label("next_sync")
+        ).where(*filters)
+        result = await db.execute(query)
+        rows = result.mappings().all()
+        
+        totals_query = select(
+            func.count(DerivConnection.id),
+            func.count(DerivConnection.id).filter(DerivConnection.connection_status == "connected")
+        ).where(*filters)
+        totals_result = await db.execute(totals_query)
+        total_connections, active_connections = totals_result.one()
         
         status_data = []
-        for connection in connections:
-            next_sync = None
-            if connection.auto_sync and connection.last_sync_at:
-                if connection.sync_frequency == "hourly":
-                    next_sync = connection.last_sync_at + timedelta(hours=1)
-                elif connection.sync_frequency == "daily":
-                    next_sync = connection.last_sync_at + timedelta(days=1)
-                elif connection.sync_frequency == "weekly":
-                    next_sync = connection.last_sync_at + timedelta(weeks=1)
-            
+        for row in rows:
+            next_sync = row["next_sync"]
             status_data.append({
-                "connection": connection.to_dict(),
+                "connection": ConnectionResponse.model_validate(row),
                 "next_sync": next_sync.isoformat() if next_sync else None,
                 "is_syncing": False, 
-                "can_sync": connection.connection_status == "connected"
+                "can_sync": row["connection_status"] == "connected"
             })
         
         return schemas.APIResponse.success_response(
             data={
                 "connections": status_data,
-                "total_connections": len(connections),
-                "active_connections": sum(1 for c in connections if c.connection_status == "connected")
+                "total_connections": total_connections,
+                "active_connections": active_connections
             }
         )
         
@@ -589,26 +893,27 @@ async def list_deriv_connections(
     if current_user is None:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        query = select(DerivConnection).where(
+        query = select(
+            *response_columns(DerivConnection, OwnerConnectionResponse),
+            DerivConnection.api_token_encrypted
+        ).where(
             DerivConnection.user_id == current_user.id
         ).order_by(desc(DerivConnection.created_at))
         
         result = await db.execute(query)
-        connections = result.scalars().all()
+        connections = result.mappings().all()
         
         print(f"DEBUG: User {current_user.id} has {len(connections)} Deriv connections")
 
+        # Decrypt tokens for owner (requested by user for persistence) in one
+        # worker-thread hop, keeping the crypto off the event loop
+        encrypted_tokens = [connection["api_token_encrypted"] for connection in connections]
+        decrypted_tokens = await asyncio.to_thread(encryption_service.decrypt_many, encrypted_tokens)
+        
         connections_data = []
-        for connection in connections:
-            data = connection.to_dict()
-            # Decrypt token for owner (requested by user for persistence)
-            if connection.api_token_encrypted:
-                try:
-                    decrypted_token = encryption_service.decrypt(connection.api_token_encrypted)
-                    data["api_token"] = decrypted_token
-                    print(f"DEBUG: Decrypted token for connection {connection.id}")
-                except Exception as e:
-                    print(f"Failed to decrypt token for connection {connection.id}: {e}")
+        for connection, decrypted_token in zip(connections, decrypted_tokens):
+            data = OwnerConnectionResponse.model_validate(connection)
+            data.api_token = decrypted_token
             connections_data.append(data)
 
         return schemas.APIResponse.success_response(
@@ -641,42 +946,47 @@ async def get_deriv_trades(
     try:
         connection = await get_deriv_connection(db, connection_id, current_user.id)
         
-        # Build query
-        query = select(DerivTrade).where(DerivTrade.connection_id == connection.id)
+        # Build filters
+        filters = [DerivTrade.connection_id == connection.id]
         
         if status and status != "all":
-            query = query.where(DerivTrade.status == status)
-        
-        # Get count (simplified)
-        count_result = await db.execute(query)
-        total_count = len(count_result.scalars().all())
+            filters.append(DerivTrade.status == status)
+        
+        # Statistics over the full filtered set, not just the page, in one round trip
+        # (the session can't run queries concurrently, so fewer statements is the win)
+        most_traded_symbol_query = select(DerivTrade.symbol).where(*filters).group_by(
+            DerivTrade.symbol
+        ).order_by(desc(func.count(DerivTrade.id)), DerivTrade.symbol).limit(1)
+        stats_query = select(
+            func.count(DerivTrade.id),
+            func.coalesce(func.sum(DerivTrade.profit), 0),
+            func.count(DerivTrade.id).filter(DerivTrade.profit > 0),
+            func.count(DerivTrade.id).filter(DerivTrade.profit < 0),
+            func.count(DerivTrade.id).filter(DerivTrade.status == "open"),
+            most_traded_symbol_query.correlate(None).scalar_subquery()
+        ).where(*filters)
+        stats_result = await db.execute(stats_query)
+        total_count, total_profit, win_count, loss_count, open_count, most_traded_symbol = stats_result.one()
         
         # Get paginated
-        query = query.order_by(desc(DerivTrade.purchase_time)).offset(offset).limit(limit)
+        query = select(*response_columns(DerivTrade, DerivTradeResponse)).where(*filters).order_by(
+            desc(DerivTrade.purchase_time)
+        ).offset(offset).limit(limit)
         result = await db.execute(query)
-        trades = result.scalars().all()
+        trades = result.mappings().all()
         
-        # Calculate statistics
         stats = {
             "total_trades": total_count,
-            "total_profit": sum(t.profit for t in trades), # only for paginated set, typically should be total
-            "win_count": sum(1 for t in trades if t.profit > 0),
-            "loss_count": sum(1 for t in trades if t.profit < 0),
-            "open_count": sum(1 for t in trades if t.status == "open"),
-            "most_traded_symbol": None
+            "total_profit": total_profit,
+            "win_count": win_count,
+            "loss_count": loss_count,
+            "open_count": open_count,
+            "most_traded_symbol": most_traded_symbol
         }
         
-        if trades:
-            symbol_counts = {}
-            for trade in trades:
-                symbol_counts[trade.symbol] = symbol_counts.get(trade.symbol, 0) + 1
-            
-            if symbol_counts:
-                stats["most_traded_symbol"] = max(symbol_counts, key=symbol_counts.get)
-        
         return schemas.APIResponse.success_response(
             data={
-                "trades": [trade.to_dict() for trade in trades],
+                "trades": [DerivTradeResponse.model_validate(trade) for trade in trades],
                 "stats": stats,
                 "pagination": {
                     "total": total_count,
@@ -708,19 +1018,27 @@ async def update_deriv_connection(
     if current_user is None:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        connection = await get_deriv_connection(db, connection_id, current_user.id)
-        
         update_data = request.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            if hasattr(connection, field):
-                setattr(connection, field, value)
-        
-        connection.updated_at = datetime.utcnow()
+        values = {field: update_data[field] for field in CONNECTION_UPDATE_FIELDS & update_data.keys()}
+        values["updated_at"] = datetime.utcnow()
+        
+        # Ownership check, update and re-read in one statement
+        result = await db.execute(
+            update(DerivConnection)
+            .where(
+                DerivConnection.id == connection_id,
+                DerivConnection.user_id == current_user.id
+            )
+            .values(values)
+            .returning(DerivConnection)
+        )
+        connection = result.scalars().first()
+        if not connection:
+            raise HTTPException(status_code=404, detail="Connection not found")
         await db.commit()
-        await db.refresh(connection)
         
         return schemas.APIResponse.success_response(
-            data=connection.to_dict(),
+            data=ConnectionResponse.model_validate(connection),
             message="Connection updated successfully"
         )
         
@@ -746,8 +1064,13 @@ async def disconnect_deriv_account(
     try:
         connection = await get_deriv_connection(db, connection_id, current_user.id)
         
+        # Delete trades and sync logs in bulk; otherwise the ORM cascade loads
+        # every child row into the session and deletes them one by one
+        await db.execute(delete(DerivTrade).where(DerivTrade.connection_id == connection.id))
+        await db.execute(delete(SyncLog).where(SyncLog.connection_id == connection.id))
         await db.delete(connection)
         await db.commit()
+        invalidate_client(connection.id)
         
         return schemas.APIResponse.success_response(
             message="Deriv account disconnected successfully"
@@ -762,38 +1085,48 @@ async def disconnect_deriv_account(
         )
 
 @router.post("/deriv/webhook", response_model=schemas.APIResponse)
-async def deriv_webhook(
-    request: WebhookEventRequest,
-    db: AsyncSession = Depends(get_async_db)
-):
+async def deriv_webhook(request: WebhookEventRequest):
     """
     Webhook endpoint for Deriv real-time updates
     """
     try:
-        webhook_event = WebhookEvent(
-            event_type=request.event,
-            event_source="deriv",
-            raw_payload=request.dict(),
-            signature=request.signature,
-            received_at=datetime.utcnow()
-        )
-        
-        db.add(webhook_event)
-        await db.commit()
-        await db.refresh(webhook_event)
+        now = datetime.utcnow()
+        event = {
+            "id": str(uuid.uuid4()),
+            "event_type": request.event,
+            "event_source": "deriv",
+            "raw_payload": request.dict(),
+            "signature": request.signature,
+            "received_at": now,
+            "processed": False,
+            "processed_at": None,
+            "trade_id": None
+        }
         
         if request.event == "transaction" and request.transaction:
             # Handle new trade (placeholder)
-            webhook_event.processed = True
-            webhook_event.processed_at = datetime.utcnow()
-            webhook_event.trade_id = request.transaction.get("transaction_id")
-            await db.commit()
+            event["processed"] = True
+            event["processed_at"] = now
+            event["trade_id"] = request.transaction.get("transaction_id")
+        
+        # Persisted by the background writer so Deriv doesn't wait on the commit.
+        # Without a running writer, or once its queue is full, store it directly
+        # so an acknowledged event is never dropped and the request never blocks.
+        queued = False
+        if _webhook_writer is not None and not _webhook_writer.done():
+            try:
+                _webhook_queue.put_nowait(event)
+                queued = True
+            except asyncio.QueueFull:
+                pass
+        if not queued:
+            await write_webhook_events([event])
         
         return schemas.APIResponse.success_response(
             data={
-                "event_id": webhook_event.id,
+                "event_id": event["id"],
                 "received": True,
-                "processed": webhook_event.processed
+                "processed": event["processed"]
             },
             message="Webhook received"
         )
@@ -804,6 +1137,65 @@ async def deriv_webhook(
             detail=f"Error processing webhook: {str(e)}"
         )
 
+async def write_webhook_events(events: List[Dict[str, Any]]):
+    """Insert a batch of webhook events in one transaction (failures are logged and re-raised)"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(WebhookEvent.__table__.insert(), events)
+            await db.commit()
+    except Exception:
+        logger.exception(
+            "Failed to store %d webhook events: %s",
+            len(events), ", ".join(event["id"] for event in events)
+        )
+        raise
+
+async def webhook_writer_task():
+    """Drain the webhook queue, writing events in batches until a None sentinel arrives"""
+    loop = asyncio.get_running_loop()
+    while True:
+        event = await _webhook_queue.get()
+        if event is None:
+            return
+        
+        batch = [event]
+        deadline = loop.time() + WEBHOOK_FLUSH_INTERVAL
+        stop = False
+        while len(batch) < WEBHOOK_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(_webhook_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if event is None:
+                stop = True
+                break
+            batch.append(event)
+        
+        try:
+            await write_webhook_events(batch)
+        except Exception:
+            # Already logged with the event IDs; keep the writer alive
+            pass
+        if stop:
+            return
+
+def start_webhook_writer():
+    """Start the background webhook writer (called on app startup)"""
+    global _webhook_writer
+    if _webhook_writer is None or _webhook_writer.done():
+        _webhook_writer = asyncio.create_task(webhook_writer_task())
+
+async def stop_webhook_writer():
+    """Flush queued webhook events and stop the writer (called on app shutdown)"""
+    global _webhook_writer
+    if _webhook_writer is not None and not _webhook_writer.done():
+        await _webhook_queue.put(None)
+        await _webhook_writer
+    _webhook_writer = None
+
 @router.get("/deriv/stats", response_model=schemas.APIResponse)
 async def get_deriv_statistics(
     current_user: User = Depends(get_current_active_user),
@@ -815,29 +1207,27 @@ async def get_deriv_statistics(
     if current_user is None:
         raise HTTPException(status_code=401, detail="Not authenticated")
     try:
-        query = select(DerivConnection).where(DerivConnection.user_id == current_user.id)
+        # Connection totals in one aggregate query
+        query = select(
+            func.count(DerivConnection.id),
+            func.count(DerivConnection.id).filter(DerivConnection.connection_status == "connected"),
+            func.coalesce(func.sum(DerivConnection.total_trades_synced), 0)
+        ).where(DerivConnection.user_id == current_user.id)
         result = await db.execute(query)
-        connections = result.scalars().all()
+        total_connections, active_connections, total_trades = result.one()
         
-        query_syncs = select(SyncLog).join(DerivConnection).where(
+        query_syncs = select(*response_columns(SyncLog, SyncLogResponse)).join(DerivConnection).where(
             DerivConnection.user_id == current_user.id
         ).order_by(desc(SyncLog.started_at)).limit(10)
         
         result_syncs = await db.execute(query_syncs)
-        recent_syncs = result_syncs.scalars().all()
-        
-        total_trades = sum(c.total_trades_synced for c in connections)
-        
-        # Simple stats counting
-        # For complex counts in async, we might want raw SQL or count() queries,
-        # but for typical user loads, python-side counting on fetched lists is acceptable if lists are small
-        # or separate count queries. Here we'll stick to simple connection-based stats.
+        recent_syncs = result_syncs.mappings().all()
         
         stats = {
-            "total_connections": len(connections),
-            "active_connections": sum(1 for c in connections if c.connection_status == "connected"),
+            "total_connections": total_connections,
+            "active_connections": active_connections,
             "total_trades_synced": total_trades,
-            "recent_syncs": [sync.to_dict() for sync in recent_syncs]
+            "recent_syncs": [SyncLogResponse.model_validate(sync) for sync in recent_syncs]
         }
         
         return schemas.APIResponse.success_response(data=stats)
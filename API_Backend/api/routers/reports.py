@@ -2,33 +2,33 @@
 API endpoints for report generation
 """
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from typing import Optional
 import io
-import tempfile
-import os
 
 from api import schemas, models, auth
-from api.database import get_db
-from core.report_generator import ReportGenerator
+from api.database import get_async_db
+from core.report_generator import generate_report_cached
 
 router = APIRouter()
 
+# Characters of report content sent per chunk by file downloads
+REPORT_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 @router.post("/generate", response_model=schemas.APIResponse)
 async def generate_report(
     request: schemas.ReportGenerateRequest,
     current_user: Optional[schemas.UserResponse] = Depends(auth.get_optional_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate a report for an analysis
     """
     try:
         # Get analysis
-        analysis = db.query(models.Analysis)\
-            .filter(models.Analysis.id == request.analysis_id)\
-            .first()
+        analysis = await db.get(models.Analysis, request.analysis_id)
         
         if not analysis:
             raise HTTPException(
@@ -43,16 +43,16 @@ async def generate_report(
                 detail="Not authorized to generate report for this analysis"
             )
         
-        # Generate report
-        generator = ReportGenerator()
+        # Generate report (bodies of unchanged analyses come from the render cache)
+        report_inputs = (
+            analysis.metrics or {},
+            analysis.risk_results or {},
+            analysis.score_result or {},
+            analysis.ai_explanations or {}
+        )
         
         if request.format == schemas.ReportFormat.MARKDOWN:
-            report_content = generator.generate_markdown_report(
-                analysis.metrics or {},
-                analysis.risk_results or {},
-                analysis.score_result or {},
-                analysis.ai_explanations or {}
-            )
+            report_content = generate_report_cached("markdown", *report_inputs)
             
             # Save to database
             report = models.Report(
@@ -62,13 +62,7 @@ async def generate_report(
             )
             
         elif request.format == schemas.ReportFormat.HTML:
-            markdown_report = generator.generate_markdown_report(
-                analysis.metrics or {},
-                analysis.risk_results or {},
-                analysis.score_result or {},
-                analysis.ai_explanations or {}
-            )
-            report_content = generator.generate_html_report(markdown_report)
+            report_content = generate_report_cached("html", *report_inputs)
             
             # Save to database
             report = models.Report(
@@ -80,12 +74,7 @@ async def generate_report(
         elif request.format == schemas.ReportFormat.PDF:
             # PDF generation (requires additional libraries like weasyprint or reportlab)
             # For now, return markdown
-            report_content = generator.generate_markdown_report(
-                analysis.metrics or {},
-                analysis.risk_results or {},
-                analysis.score_result or {},
-                analysis.ai_explanations or {}
-            )
+            report_content = generate_report_cached("markdown", *report_inputs)
             
             report = models.Report(
                 analysis_id=analysis.id,
@@ -99,8 +88,8 @@ async def generate_report(
             )
         
         db.add(report)
-        db.commit()
-        db.refresh(report)
+        await db.commit()
+        await db.refresh(report)
         
         response_data = schemas.ReportResponse(
             id=report.id,
@@ -127,25 +116,27 @@ async def download_report(
     report_id: str,
     format: Optional[str] = None,
     current_user: Optional[schemas.UserResponse] = Depends(auth.get_optional_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Download a generated report
     """
-    report = db.query(models.Report).filter(models.Report.id == report_id).first()
+    # Report and its analysis owner (for the authorization check) in one query
+    result = await db.execute(
+        select(models.Report, models.Analysis.user_id)
+        .outerjoin(models.Analysis, models.Analysis.id == models.Report.analysis_id)
+        .where(models.Report.id == report_id)
+    )
+    row = result.first()
     
-    if not report:
+    if not row:
         raise HTTPException(
             status_code=404,
             detail="Report not found"
         )
+    report, owner_id = row
     
-    # Get associated analysis for authorization check
-    analysis = db.query(models.Analysis)\
-        .filter(models.Analysis.id == report.analysis_id)\
-        .first()
-    
-    if current_user and analysis.user_id and analysis.user_id != current_user.id:
+    if current_user and owner_id and owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="Not authorized to download this report"
@@ -153,24 +144,23 @@ async def download_report(
     
     # Update download count
     report.download_count = (report.download_count or 0) + 1
-    db.commit()
+    await db.commit()
     
     # Return appropriate response
     if format == "file" and report.content:
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=f".{report.report_type}") as f:
-            f.write(report.content)
-            temp_path = f.name
+        # Stream the stored content straight out in chunks, without a temp file copy
+        content = report.content
         
-        try:
-            return FileResponse(
-                temp_path,
-                filename=f"tradeguard_report_{report.id}.{report.report_type}",
-                media_type="text/plain" if report.report_type == "markdown" else "text/html"
-            )
-        finally:
-            # Clean up temp file after sending
-            os.unlink(temp_path)
+        def iter_content():
+            for start in range(0, len(content), REPORT_DOWNLOAD_CHUNK_SIZE):
+                yield content[start:start + REPORT_DOWNLOAD_CHUNK_SIZE].encode("utf-8")
+        
+        filename = f"tradeguard_report_{report.id}.{report.report_type}"
+        return StreamingResponse(
+            iter_content(),
+            media_type="text/plain" if report.report_type == "markdown" else "text/html",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
     
     else:
         # Return as JSON with content
@@ -187,32 +177,40 @@ async def download_report(
 async def list_reports(
     analysis_id: str,
     current_user: Optional[schemas.UserResponse] = Depends(auth.get_optional_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all reports for an analysis
     """
-    analysis = db.query(models.Analysis)\
-        .filter(models.Analysis.id == analysis_id)\
-        .first()
+    # The analysis owner and its report listing in one query; an analysis
+    # without reports still yields one row (with NULL report columns)
+    result = await db.execute(
+        select(
+            models.Analysis.user_id,
+            models.Report.id,
+            models.Report.report_type,
+            models.Report.download_count,
+            models.Report.generated_at
+        )
+        .outerjoin(models.Report, models.Report.analysis_id == models.Analysis.id)
+        .where(models.Analysis.id == analysis_id)
+        .order_by(models.Report.generated_at.desc())
+    )
+    rows = result.all()
     
-    if not analysis:
+    if not rows:
         raise HTTPException(
             status_code=404,
             detail="Analysis not found"
         )
     
-    if current_user and analysis.user_id and analysis.user_id != current_user.id:
+    owner_id = rows[0].user_id
+    if current_user and owner_id and owner_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="Not authorized to view reports for this analysis"
         )
     
-    reports = db.query(models.Report)\
-        .filter(models.Report.analysis_id == analysis_id)\
-        .order_by(models.Report.generated_at.desc())\
-        .all()
-    
     response_data = [
         {
             "id": r.id,
@@ -221,7 +219,8 @@ async def list_reports(
             "generated_at": r.generated_at,
             "download_url": f"/api/reports/download/{r.id}"
         }
-        for r in reports
+        for r in rows
+        if r.id is not None
     ]
     
     return schemas.APIResponse.success_response(data=response_data)
\ No newline at end of file
@@ -1,13 +1,14 @@
 """
 API endpoints for risk assessment
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import Optional
 import numpy as np
+import orjson
 
 from api import schemas, auth
 from core.risk_scorer import RiskScorer
-from core.ai_explainer import AIRiskExplainer
+from core.ai_explainer import AIRiskExplainer, generate_explanation_cached
 
 router = APIRouter()
 
@@ -49,8 +50,7 @@ async def get_risk_explanations(
         risk_results = request.get("risk_results", {})
         score_result = request.get("score_result", {})
         
-        ai_explainer = AIRiskExplainer()
-        explanations = ai_explainer.generate_explanation(
+        explanations = generate_explanation_cached(
             metrics,
             risk_results,
             score_result
@@ -59,7 +59,7 @@ async def get_risk_explanations(
         # Format for display if requested
         formatted = None
         if request.get("format_for_display", False):
-            formatted = ai_explainer.format_for_display(explanations)
+            formatted = AIRiskExplainer().format_for_display(explanations)
         
         response_data = {
             "explanations": explanations,
@@ -87,17 +87,20 @@ async def simulate_risk_improvement(
         current_score = simulation.current_score
         improvements = simulation.improvements
         
-        # Simple simulation: each percentage improvement adds to score
-        improvement_total = sum(improvements.values())
-        simulated_score = min(100, current_score + (improvement_total * 0.5))
+        # Each risk's improvement (in percent) wins back that share of the risk's
+        # weight in the score, mirroring how RiskScorer deducts it; unknown risks count for nothing
+        scorer = RiskScorer()
+        risk_weights = scorer.risk_weights
+        improvement_total = sum(
+            improvement * risk_weights[risk] / 100
+            for risk, improvement in improvements.items()
+            if risk in risk_weights
+        )
+        simulated_score = min(100, current_score + improvement_total)
         
         # Determine new grade
-        scorer = RiskScorer()
-        simulated_grade = None
-        for grade, (lower, upper) in scorer.grade_boundaries.items():
-            if lower <= simulated_score <= upper:
-                simulated_grade = grade
-                break
+        simulated_grade = scorer._get_grade(simulated_score)
+        current_grade = scorer._get_grade(current_score)
         
         # Generate recommendations
         recommendations = []
@@ -107,16 +110,16 @@ async def simulate_risk_improvement(
                 f"Implementing these improvements could increase your score by {improvement:.1f} points"
             )
             
-            if simulated_grade and simulated_grade != scorer._get_grade(current_score):
+            if simulated_grade != current_grade:
                 recommendations.append(
-                    f"This could improve your grade from {scorer._get_grade(current_score)} to {simulated_grade}"
+                    f"This could improve your grade from {current_grade} to {simulated_grade}"
                 )
         
         response_data = schemas.RiskSimulationResponse(
             original_score=current_score,
             simulated_score=simulated_score,
             improvement=simulated_score - current_score,
-            new_grade=simulated_grade or scorer._get_grade(current_score),
+            new_grade=simulated_grade,
             recommendations=recommendations
         )
         
@@ -128,42 +131,48 @@ async def simulate_risk_improvement(
             detail=f"Error running simulation: {str(e)}"
         )
 
+# Risk type catalogue; the /types response never changes, so its JSON body
+# is serialized once at import and served as-is
+RISK_TYPES = {
+    "over_leverage": {
+        "name": "Over Leverage",
+        "description": "Position size too large relative to account balance",
+        "threshold": "2% of account per trade",
+        "weight": 30
+    },
+    "no_stop_loss": {
+        "name": "No Stop Loss",
+        "description": "Trading without stop-loss orders",
+        "threshold": "80% minimum usage rate",
+        "weight": 25
+    },
+    "high_drawdown": {
+        "name": "High Drawdown",
+        "description": "Excessive peak-to-trough decline in account value",
+        "threshold": "20% maximum drawdown",
+        "weight": 20
+    },
+    "revenge_trading": {
+        "name": "Revenge Trading",
+        "description": "Trading shortly after losses, often emotionally driven",
+        "threshold": "10% maximum revenge trades",
+        "weight": 15
+    },
+    "poor_rr_ratio": {
+        "name": "Poor Risk-Reward Ratio",
+        "description": "Unfavorable ratio of potential profit to potential loss",
+        "threshold": "1:1 minimum ratio",
+        "weight": 10
+    }
+}
+
+_RISK_TYPES_JSON = orjson.dumps(
+    schemas.APIResponse.success_response(data=RISK_TYPES).model_dump(mode="json")
+)
+
 @router.get("/types", response_model=schemas.APIResponse)
 async def get_risk_types():
     """
     Get all risk types and their descriptions
     """
-    risk_types = {
-        "over_leverage": {
-            "name": "Over Leverage",
-            "description": "Position size too large relative to account balance",
-            "threshold": "2% of account per trade",
-            "weight": 30
-        },
-        "no_stop_loss": {
-            "name": "No Stop Loss",
-            "description": "Trading without stop-loss orders",
-            "threshold": "80% minimum usage rate",
-            "weight": 25
-        },
-        "high_drawdown": {
-            "name": "High Drawdown",
-            "description": "Excessive peak-to-trough decline in account value",
-            "threshold": "20% maximum drawdown",
-            "weight": 20
-        },
-        "revenge_trading": {
-            "name": "Revenge Trading",
-            "description": "Trading shortly after losses, often emotionally driven",
-            "threshold": "10% maximum revenge trades",
-            "weight": 15
-        },
-        "poor_rr_ratio": {
-            "name": "Poor Risk-Reward Ratio",
-            "description": "Unfavorable ratio of potential profit to potential loss",
-            "threshold": "1:1 minimum ratio",
-            "weight": 10
-        }
-    }
-    
-    return schemas.APIResponse.success_response(data=risk_types)
\ No newline at end of file
+    return Response(content=_RISK_TYPES_JSON, media_type="application/json")
@@ -2,40 +2,46 @@
 API endpoints for user management
 """
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from datetime import timedelta
 from typing import Optional
 
 from api import schemas, models, auth
 from api.config import settings
-from api.database import get_db
+from api.database import get_async_db
+from api.utils.openai_keys import invalidate_openai_key
 
 router = APIRouter()
 
 @router.post("/register", response_model=schemas.APIResponse)
 async def register_user(
     user_data: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user
     """
     # Check if user already exists
-    existing_user = db.query(models.User)\
-        .filter(
-            (models.User.email == user_data.email) | 
-            (models.User.username == user_data.username)
-        )\
-        .first()
-    
-    if existing_user:
+    user_exists = await db.scalar(
+        select(
+            select(models.User.id)
+            .where(
+                (models.User.email == user_data.email) | 
+                (models.User.username == user_data.username)
+            )
+            .exists()
+        )
+    )
+    
+    if user_exists:
         raise HTTPException(
             status_code=400,
             detail="User with this email or username already exists"
         )
     
     # Create new user
-    hashed_password = auth.get_password_hash(user_data.password)
+    hashed_password = await auth.get_password_hash(user_data.password)
     
     user = models.User(
         email=user_data.email,
@@ -43,14 +49,15 @@ async def register_user(
         hashed_password=hashed_password
     )
     
+    # User and default settings land in one transaction; the flush assigns
+    # user.id (and created_at) without committing
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.flush()
     
     # Create default settings for user (avoid overwriting 'settings')
     user_settings = models.UserSettings(user_id=user.id)
     db.add(user_settings)
-    db.commit()
+    await db.commit()
     
     # Create access token using constant from auth.py
     access_token = auth.create_access_token(
@@ -77,16 +84,17 @@ async def register_user(
 @router.post("/login", response_model=schemas.APIResponse)
 async def login_user(
     login_data: schemas.UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login user and return access token
     """
-    user = db.query(models.User)\
-        .filter(models.User.email == login_data.email)\
-        .first()
+    result = await db.execute(
+        select(models.User).where(models.User.email == login_data.email)
+    )
+    user = result.scalars().first()
     
-    if not user or not auth.verify_password(login_data.password, user.hashed_password):
+    if not user or not await auth.verify_password(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password"
@@ -98,6 +106,11 @@ async def login_user(
             detail="Inactive user"
         )
     
+    # Upgrade the stored hash if it is weaker than the configured cost factor
+    if auth.password_needs_rehash(user.hashed_password):
+        user.hashed_password = await auth.get_password_hash(login_data.password)
+        await db.commit()
+    
     # Create access token
     access_token = auth.create_access_token(
         data={"sub": user.id},
@@ -122,8 +135,7 @@ async def login_user(
 
 @router.get("/profile", response_model=schemas.APIResponse)
 async def get_user_profile(
-    current_user: schemas.UserResponse = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.UserResponse = Depends(auth.get_current_active_user)
 ):
     """
     Get current user's profile
@@ -148,7 +160,7 @@ async def get_user_profile(
 @router.get("/settings", response_model=schemas.APIResponse)
 async def get_user_settings(
     current_user: schemas.UserResponse = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get user settings
@@ -159,16 +171,17 @@ async def get_user_settings(
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    settings = db.query(models.UserSettings)\
-        .filter(models.UserSettings.user_id == current_user.id)\
-        .first()
+    result = await db.execute(
+        select(models.UserSettings).where(models.UserSettings.user_id == current_user.id)
+    )
+    settings = result.scalars().first()
     
     if not settings:
         # Create default settings if not exists
         settings = models.UserSettings(user_id=current_user.id)
         db.add(settings)
-        db.commit()
-        db.refresh(settings)
+        await db.commit()
+        await db.refresh(settings)
     
     response_data = schemas.UserSettingsResponse(
         user_id=settings.user_id,
@@ -190,7 +203,7 @@ async def get_user_settings(
 async def update_user_settings(
     settings_update: schemas.UserSettingsUpdate,
     current_user: schemas.UserResponse = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user settings
@@ -201,9 +214,10 @@ async def update_user_settings(
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    settings = db.query(models.UserSettings)\
-        .filter(models.UserSettings.user_id == current_user.id)\
-        .first()
+    result = await db.execute(
+        select(models.UserSettings).where(models.UserSettings.user_id == current_user.id)
+    )
+    settings = result.scalars().first()
     
     if not settings:
         settings = models.UserSettings(user_id=current_user.id)
@@ -225,8 +239,9 @@ async def update_user_settings(
         if hasattr(settings, field):
             setattr(settings, field, value)
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
+    invalidate_openai_key(current_user.id)
     
     response_data = schemas.UserSettingsResponse(
         user_id=settings.user_id,
@@ -46,6 +46,7 @@ from .integrations import (
     SyncResultResponse,
     DerivTradeResponse,
     ConnectionResponse,
+    OwnerConnectionResponse,
     SyncLogResponse,
     WebhookResponse,
     ConnectionStats,
@@ -98,6 +99,7 @@ __all__ = [
     "SyncResultResponse",
     "DerivTradeResponse",
     "ConnectionResponse",
+    "OwnerConnectionResponse",
     "SyncLogResponse",
     "WebhookResponse",
     "ConnectionStats",
@@ -1,8 +1,9 @@
 """
 Pydantic schemas for predictive alerts
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, field_validator
 from typing import Optional, List, Dict, Any
+import uuid
 from datetime import datetime
 from enum import Enum
 
@@ -38,6 +39,12 @@ class GenerateAlertsRequest(BaseModel):
     include_market_data: bool = False
     force_regenerate: bool = False
 
+    @field_validator("analysis_id")
+    @classmethod
+    def validate_analysis_id(cls, value):
+        # Reject malformed IDs with a 422 before they reach the database
+        return str(uuid.UUID(value)) if value else value
+
 class AcknowledgeAlertRequest(BaseModel):
     notes: Optional[str] = None
 
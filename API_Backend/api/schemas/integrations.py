@@ -1,7 +1,7 @@
 """
 Pydantic schemas for Deriv/MT5 integration
 """
-from pydantic import BaseModel, Field, validator, HttpUrl
+from pydantic import BaseModel, Field, validator, field_validator, HttpUrl
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -125,9 +125,18 @@ class ConnectionResponse(BaseModel):
     connected_at: Optional[datetime] = None
     last_error: Optional[str] = None
     
+    @field_validator("account_info", mode="before")
+    @classmethod
+    def default_account_info(cls, value):
+        return value or {}
+    
     class Config:
         from_attributes = True
 
+class OwnerConnectionResponse(ConnectionResponse):
+    """Connection as shown to its owner, with the decrypted API token"""
+    api_token: Optional[str] = None
+
 class SyncLogResponse(BaseModel):
     id: str
     sync_type: str
@@ -135,6 +144,8 @@ class SyncLogResponse(BaseModel):
     trades_fetched: int
     trades_new: int
     trades_updated: int
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
     duration_seconds: Optional[float] = None
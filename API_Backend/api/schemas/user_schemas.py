@@ -1,8 +1,9 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, validator, field_validator
 from typing import Optional, List, Dict, Any
+import uuid
 from datetime import datetime
 from enum import Enum
 
@@ -73,6 +74,12 @@ class ReportGenerateRequest(BaseModel):
     format: ReportFormat = ReportFormat.MARKDOWN
     include_sections: List[str] = Field(default_factory=list)
 
+    @field_validator("analysis_id")
+    @classmethod
+    def validate_analysis_id(cls, value):
+        # Reject malformed IDs with a 422 before they reach the database
+        return str(uuid.UUID(value))
+
 class ReportResponse(BaseModel):
     id: str
     analysis_id: str
@@ -3,10 +3,27 @@ Deriv WebSocket API Client
 """
 import asyncio
 import json
+import threading
 import websockets
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 
+from cachetools import TTLCache
+
+from api.utils.encryption import encryption_service
+
+class DerivAuthError(Exception):
+    """Raised when Deriv rejects the API token"""
+
+
+class DerivAPIError(Exception):
+    """Raised when a Deriv request fails for any reason other than auth"""
+
+
+# Deriv caps profit_table at 500 rows per request
+PROFIT_TABLE_PAGE_SIZE = 500
+
+
 class DerivAPIClient:
     """
     Async Client for interacting with Deriv WebSocket API
@@ -131,7 +148,28 @@ class DerivAPIClient:
 
     async def get_trades(self, days_back: int = 30) -> List[Dict[str, Any]]:
         """
-        Get closed trades using the 'profit_table' endpoint.
+        Get closed trades from the last `days_back` days.
+        Raises DerivAuthError if the token is rejected, DerivAPIError otherwise.
+        """
+        # date_from is "Epoch value of the starting date of the search."
+        date_from = int((datetime.now().timestamp()) - (days_back * 86400))
+        return await self._get_profit_table(date_from)
+
+    async def get_trades_since(self, since: datetime) -> List[Dict[str, Any]]:
+        """
+        Get closed trades from `since` onwards (naive datetimes are UTC).
+        Raises DerivAuthError if the token is rejected, DerivAPIError otherwise.
+        """
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return await self._get_profit_table(int(since.timestamp()))
+
+    async def _get_profit_table(self, date_from: int) -> List[Dict[str, Any]]:
+        """
+        Get closed trades using the 'profit_table' endpoint, paging through
+        every transaction since `date_from`.
+        Raises DerivAuthError on a rejected token and DerivAPIError on any other
+        failure, so a sync never mistakes a failed fetch for "no new trades".
         """
         try:
             # 1. Authorize First (Required for private data)
@@ -141,42 +179,45 @@ class DerivAPIClient:
                 auth_res = json.loads(await websocket.recv())
                 
                 if "error" in auth_res:
-                    raise Exception(f"Auth failed: {auth_res['error']['message']}")
-                
-                # 2. Fetch Profit Table
-                # limit=3000 is a safe upper bound; for full history ensure paging if needed.
-                # date_from is "Epoch value of the starting date of the search."
-                date_from = int((datetime.now().timestamp()) - (days_back * 86400))
-                
-                req = {
-                    "profit_table": 1,
-                    "description": 1, 
-                    "limit": 100, # Start small for safety, or increase
-                    "date_from": date_from,
-                    "sort": "DESC" # Newest first
-                }
-                
-                await websocket.send(json.dumps(req))
-                res_str = await websocket.recv()
-                res = json.loads(res_str)
-                
-                if "error" in res:
-                    raise Exception(f"Fetch failed: {res['error']['message']}")
-                
-                transactions = res.get("profit_table", {}).get("transactions", [])
+                    raise DerivAuthError(f"Auth failed: {auth_res['error']['message']}")
                 
-                # 3. Transform basic ProfitTable data to our schema
+                # 2. Fetch Profit Table, one page at a time
                 trades = []
-                for tx in transactions:
-                    trade = self.transform_transaction_to_trade(tx)
-                    if trade:
-                        trades.append(trade)
-                
-                return trades
+                offset = 0
+                while True:
+                    req = {
+                        "profit_table": 1,
+                        "description": 1, 
+                        "limit": PROFIT_TABLE_PAGE_SIZE,
+                        "offset": offset,
+                        "date_from": date_from,
+                        "sort": "DESC" # Newest first
+                    }
+                    
+                    await websocket.send(json.dumps(req))
+                    res_str = await websocket.recv()
+                    res = json.loads(res_str)
+                    
+                    if "error" in res:
+                        raise DerivAPIError(f"Fetch failed: {res['error']['message']}")
+                    
+                    transactions = res.get("profit_table", {}).get("transactions", [])
+                    
+                    # 3. Transform basic ProfitTable data to our schema
+                    for tx in transactions:
+                        trade = self.transform_transaction_to_trade(tx)
+                        if trade:
+                            trades.append(trade)
+                    
+                    if len(transactions) < PROFIT_TABLE_PAGE_SIZE:
+                        return trades
+                    offset += len(transactions)
 
+        except (DerivAuthError, DerivAPIError):
+            raise
         except Exception as e:
-            print(f"Detail Fetch Error: {e}")
-            return []
+            # Network failures and timeouts must fail the sync too
+            raise DerivAPIError(f"Fetch failed: {e}") from e
 
     def transform_transaction_to_trade(self, tx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -237,4 +278,40 @@ class DerivAPIClient:
             parts = shortcode.split("_")
             if len(parts) > 1:
                 return f"{parts[1]}_{parts[2]}" # e.g. R_100, Frx_EURUSD
-        return display_name or "Unknown"
\ No newline at end of file
+        return display_name or "Unknown"
+
+
+# Clients (holding the decrypted token) keyed by connection ID, so repeated
+# syncs skip the decrypt. Entries are rebuilt when the stored token, app or
+# account changes, and dropped on auth failure or disconnect.
+DERIV_CLIENT_CACHE_TTL_SECONDS = 900
+_client_cache = TTLCache(maxsize=256, ttl=DERIV_CLIENT_CACHE_TTL_SECONDS)
+_client_cache_lock = threading.Lock()
+
+
+def get_client_for_connection(connection) -> Optional[DerivAPIClient]:
+    """Return a cached client for a DerivConnection, or None if its token can't be decrypted"""
+    fingerprint = (connection.api_token_encrypted, connection.app_id, connection.account_id)
+    with _client_cache_lock:
+        cached = _client_cache.get(connection.id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    api_token = encryption_service.decrypt(connection.api_token_encrypted)
+    if not api_token:
+        return None
+
+    client = DerivAPIClient(
+        api_token=api_token,
+        app_id=connection.app_id,
+        account_id=connection.account_id
+    )
+    with _client_cache_lock:
+        _client_cache[connection.id] = (fingerprint, client)
+    return client
+
+
+def invalidate_client(connection_id) -> None:
+    """Drop a cached client after an auth failure or disconnect"""
+    with _client_cache_lock:
+        _client_cache.pop(connection_id, None)
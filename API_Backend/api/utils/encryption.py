@@ -7,7 +7,11 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 import json
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+# Decrypted values kept per ciphertext; a rotated secret has a new ciphertext
+DECRYPT_CACHE_SIZE = 1024
 
 class EncryptionService:
     """Service for encrypting/decrypting sensitive data"""
@@ -27,6 +31,11 @@ class EncryptionService:
         )
         key = base64.urlsafe_b64encode(kdf.derive(self.secret_key.encode()))
         self.cipher = Fernet(key)
+        # Failed decrypts raise inside the cached call, so they are never cached
+        self._decrypt_cached = lru_cache(maxsize=DECRYPT_CACHE_SIZE)(self._decrypt_uncached)
+    
+    def _decrypt_uncached(self, encrypted_data: str) -> str:
+        return self.cipher.decrypt(encrypted_data.encode()).decode()
     
     def encrypt(self, data: str) -> str:
         """Encrypt a string"""
@@ -35,11 +44,16 @@ class EncryptionService:
     def decrypt(self, encrypted_data: str) -> Optional[str]:
         """Decrypt an encrypted string"""
         try:
-            return self.cipher.decrypt(encrypted_data.encode()).decode()
+            return self._decrypt_cached(encrypted_data)
         except Exception as e:
             print(f"Decryption error: {e}")
             return None
     
+    def decrypt_many(self, encrypted_values: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """Decrypt several strings in one call; empty values map to None"""
+        decrypt = self.decrypt
+        return [decrypt(value) if value else None for value in encrypted_values]
+    
     def encrypt_dict(self, data: dict) -> str:
         """Encrypt a dictionary"""
         json_str = json.dumps(data)
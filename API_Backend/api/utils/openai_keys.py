@@ -0,0 +1,49 @@
+"""
+Per-user OpenAI API key lookup with a short-lived in-process cache
+"""
+import threading
+from typing import Optional
+
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from api import models
+from api.utils.encryption import encryption_service
+
+# Decrypted keys (or None for users without one), keyed by user ID.
+# Updates in this process invalidate immediately; other workers see them within the TTL.
+OPENAI_KEY_CACHE_TTL_SECONDS = 300
+_openai_key_cache = TTLCache(maxsize=1024, ttl=OPENAI_KEY_CACHE_TTL_SECONDS)
+_openai_key_cache_lock = threading.Lock()
+_MISSING = object()
+
+
+async def get_openai_key_for_user(db: AsyncSession, user_id: str) -> Optional[str]:
+    """Return the user's decrypted OpenAI key, skipping the query and decrypt when cached"""
+    with _openai_key_cache_lock:
+        cached = _openai_key_cache.get(user_id, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    result = await db.execute(
+        select(models.UserSettings.openai_api_key_encrypted)
+        .where(models.UserSettings.user_id == user_id)
+    )
+    encrypted_key = result.scalar()
+
+    openai_api_key = None
+    if encrypted_key:
+        openai_api_key = encryption_service.decrypt(encrypted_key)
+        if openai_api_key is None:
+            print(f"Failed to decrypt OpenAI key for user {user_id}")
+
+    with _openai_key_cache_lock:
+        _openai_key_cache[user_id] = openai_api_key
+    return openai_api_key
+
+
+def invalidate_openai_key(user_id: str) -> None:
+    """Drop a cached key after the user's settings change"""
+    with _openai_key_cache_lock:
+        _openai_key_cache.pop(user_id, None)
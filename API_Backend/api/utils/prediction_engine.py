@@ -213,34 +213,38 @@ class PredictionEngine:
             if 'profit_loss' in self.df.columns and 'entry_time' in self.df.columns:
                 loss_indices = self.df[self.df['profit_loss'] < 0].index
                 if len(loss_indices) >= 2:
-                    # Check time between loss and next trade
-                    for i in range(len(loss_indices) - 1):
-                        loss_time = self.df.loc[loss_indices[i], 'entry_time']
-                        next_trade_time = self.df.loc[loss_indices[i] + 1, 'entry_time'] if loss_indices[i] + 1 < len(self.df) else None
-                        
-                        if next_trade_time:
-                            time_diff = (next_trade_time - loss_time).total_seconds() / 3600  # hours
-                            if time_diff < 2:  # Trade within 2 hours of a loss
-                                alerts.append({
-                                    "alert_type": "behavioral",
-                                    "severity": "high",
-                                    "title": "Quick Trade After Loss",
-                                    "description": f"You traded within {time_diff:.1f} hours of a loss. "
-                                                 f"This could be revenge trading.",
-                                    "confidence": 0.7,
-                                    "timeframe": "next_trade",
-                                    "suggested_actions": [
-                                        "Wait at least 4 hours after a loss",
-                                        "Review your emotional state before trading",
-                                        "Stick to your trading schedule"
-                                    ],
-                                    "trigger_conditions": {
-                                        "pattern": "quick_trade_after_loss",
-                                        "hours_after_loss": time_diff,
-                                        "loss_amount": self.df.loc[loss_indices[i], 'profit_loss']
-                                    }
-                                })
-                                break
+                    # Time between each loss (but the last) and the trade recorded right after it
+                    checked_losses = loss_indices[:-1]
+                    entry_times = self.df['entry_time']
+                    next_trade_times = entry_times.reindex(checked_losses + 1).to_numpy()
+                    hours_after_loss = (
+                        (next_trade_times - entry_times.loc[checked_losses].to_numpy())
+                        / np.timedelta64(1, 'h')
+                    )
+                    quick_trades = np.flatnonzero(hours_after_loss < 2)  # Trade within 2 hours of a loss
+                    
+                    if len(quick_trades):
+                        first_quick = quick_trades[0]
+                        time_diff = float(hours_after_loss[first_quick])
+                        alerts.append({
+                            "alert_type": "behavioral",
+                            "severity": "high",
+                            "title": "Quick Trade After Loss",
+                            "description": f"You traded within {time_diff:.1f} hours of a loss. "
+                                         f"This could be revenge trading.",
+                            "confidence": 0.7,
+                            "timeframe": "next_trade",
+                            "suggested_actions": [
+                                "Wait at least 4 hours after a loss",
+                                "Review your emotional state before trading",
+                                "Stick to your trading schedule"
+                            ],
+                            "trigger_conditions": {
+                                "pattern": "quick_trade_after_loss",
+                                "hours_after_loss": time_diff,
+                                "loss_amount": self.df.loc[checked_losses[first_quick], 'profit_loss']
+                            }
+                        })
             
         except Exception as e:
             print(f"Error in behavioral detection: {e}")
@@ -351,23 +355,16 @@ class PredictionEngine:
     
     def _count_consecutive_losses(self, profit_series: pd.Series) -> int:
         """Count consecutive losses at the end of the series"""
-        count = 0
-        for profit in reversed(profit_series):
-            if profit < 0:
-                count += 1
-            else:
-                break
-        return count
+        return self._count_trailing(profit_series.to_numpy() < 0)
     
     def _count_consecutive_wins(self, profit_series: pd.Series) -> int:
         """Count consecutive wins at the end of the series"""
-        count = 0
-        for profit in reversed(profit_series):
-            if profit > 0:
-                count += 1
-            else:
-                break
-        return count
+        return self._count_trailing(profit_series.to_numpy() > 0)
+    
+    def _count_trailing(self, mask: np.ndarray) -> int:
+        """Length of the run of True values at the end of a boolean array"""
+        breaks = np.flatnonzero(~mask)
+        return int(len(mask) - 1 - breaks[-1]) if len(breaks) else len(mask)
     
     def _calculate_alert_severity(self, probability: float, impact: float) -> str:
         """Calculate alert severity based on probability and impact"""
@@ -1,9 +1,15 @@
 # core/ai_explainer.py
 import os
+import copy
+import hashlib
+import threading
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 import json
 
+import orjson
+from cachetools import TTLCache
+
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import (
@@ -18,6 +24,8 @@ from pydantic import BaseModel, Field
 from core.risk_rules import RiskRuleEngine
 from core.risk_scorer import RiskScorer
 
+# Chat model behind every AI explanation (part of the explanation cache key)
+AI_MODEL = "gpt-4o-mini"
 
 @dataclass
 class RiskExplanation:
@@ -51,7 +59,7 @@ class AIRiskExplainer:
             self.mock_mode = False
             os.environ["OPENAI_API_KEY"] = self.api_key
             self.llm = ChatOpenAI(
-                model="gpt-4o-mini",
+                model=AI_MODEL,
                 temperature=0.3,
                 max_tokens=1000
             )
@@ -112,7 +120,7 @@ class AIRiskExplainer:
             parsed = self.output_parser.parse(response.content)
             parsed = parsed.model_dump()
 
-            parsed["ai_model"] = "gpt-4o-mini"
+            parsed["ai_model"] = AI_MODEL
             parsed["timestamp"] = self._get_timestamp()
 
             return parsed
@@ -437,6 +445,75 @@ class AIRiskExplainer:
         
         return output
 
+# Explanation cache: identical analysis inputs explained with the same API key
+# and model produce the same explanation, so repeat uploads (and the sample
+# data) skip the OpenAI round-trip. Keys never share entries across users.
+EXPLANATION_CACHE_TTL_SECONDS = 3600
+_explanation_cache = TTLCache(maxsize=1024, ttl=EXPLANATION_CACHE_TTL_SECONDS)
+_explanation_cache_lock = threading.Lock()
+
+# Demo-mode explainer shared by every request without an OpenAI key; the
+# template explanations need none of the per-instance LLM/prompt setup
+_offline_explainer: Optional[AIRiskExplainer] = None
+
+
+def _get_offline_explainer() -> AIRiskExplainer:
+    global _offline_explainer
+    if _offline_explainer is None:
+        _offline_explainer = AIRiskExplainer()
+    return _offline_explainer
+
+
+def _explanation_fingerprint(metrics: Dict[str, Any],
+                             risk_results: Dict[str, Any],
+                             score_result: Dict[str, Any],
+                             api_key: str) -> Optional[str]:
+    """Stable hash of the explainer inputs, API key and model, or None if unhashable"""
+    key_digest = hashlib.sha256(api_key.encode()).hexdigest()
+    try:
+        payload = orjson.dumps(
+            (key_digest, AI_MODEL, metrics, risk_results, score_result),
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    except TypeError:
+        return None
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def generate_explanation_cached(metrics: Dict[str, Any],
+                                risk_results: Dict[str, Any],
+                                score_result: Dict[str, Any],
+                                openai_api_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return the AI explanation for these inputs, reusing a cached result when
+    the same metrics/risks/score were explained recently with the same API
+    key and model. Only real model output is cached; offline fallbacks are
+    cheap and should retry next time.
+    """
+    api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        # Template explanations are cheap, so skip the fingerprint and cache entirely
+        return _get_offline_explainer().generate_explanation(metrics, risk_results, score_result)
+
+    fingerprint = _explanation_fingerprint(metrics, risk_results, score_result, api_key)
+    if fingerprint is not None:
+        with _explanation_cache_lock:
+            cached = _explanation_cache.get(fingerprint)
+        if cached is not None:
+            # Callers get their own copy to modify
+            return copy.deepcopy(cached)
+
+    explanation = AIRiskExplainer(openai_api_key=openai_api_key).generate_explanation(
+        metrics, risk_results, score_result
+    )
+
+    if fingerprint is not None and explanation.get('ai_model') != 'offline_fallback':
+        with _explanation_cache_lock:
+            _explanation_cache[fingerprint] = copy.deepcopy(explanation)
+    return explanation
+
+
 # Test function
 def test_ai_explainer():
     """Test the AI explainer functionality"""
@@ -0,0 +1,129 @@
+"""
+CPU-bound trade analysis stages, run in a process pool so they scale
+across cores instead of contending for the GIL in the threadpool.
+Kept free of API imports: workers only need this module (the stages and
+their initializer). Under `uvicorn main:app` they never load main; when
+main.py is run as a script, spawn re-imports it in each worker, which only
+builds the app object (startup work lives in its lifespan).
+"""
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import pandas as pd
+
+from core.metrics_calculator import TradeMetricsCalculator
+from core.risk_rules import RiskRuleEngine
+from core.risk_scorer import RiskScorer
+from core.pattern_recognition import PatternDetector
+from core.news_service import news_service
+
+# Every web worker has its own pool, so split the cores between them (the
+# same WEB_CONCURRENCY uvicorn reads for --workers) and keep the pool small
+MAX_DEFAULT_ANALYSIS_WORKERS = 4
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+ANALYSIS_WORKERS = int(os.getenv(
+    "ANALYSIS_WORKERS",
+    min(MAX_DEFAULT_ANALYSIS_WORKERS, max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))
+))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _init_analysis_worker() -> None:
+    """Runs once in each pool worker"""
+    # Ctrl+C reaches the whole process group; the server shuts the pool down
+    # on exit, so workers should not die mid-task with a KeyboardInterrupt
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def get_analysis_executor() -> ProcessPoolExecutor:
+    """Process pool for analysis stages, created on first use"""
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that already runs the event loop and threadpool is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=ANALYSIS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_analysis_worker
+        )
+    return _executor
+
+
+def shutdown_analysis_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def parse_trade_times(values: pd.Series) -> pd.Series:
+    """
+    Parse trade timestamps in one vectorized pass (unparseable values become NaT).
+    Tries the ISO 8601 fast path first and only falls back to per-column
+    format inference if that loses values, e.g. MT5's "2024.01.01 10:00".
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    try:
+        times = pd.to_datetime(values, format="ISO8601", errors="coerce", cache=True)
+        if times.isna().sum() <= values.isna().sum():
+            return times
+    except ValueError:
+        # e.g. mixed UTC offsets
+        pass
+    return pd.to_datetime(values, errors="coerce", cache=True)
+
+
+def score_trade_data(df: pd.DataFrame):
+    """Compute metrics, rule-based risks and the risk score (CPU Bound)"""
+
+    # Calculate metrics
+    calculator = TradeMetricsCalculator(df)
+    metrics = calculator.compute_all_metrics()
+
+    # Detect risks (Rules)
+    risk_engine = RiskRuleEngine(metrics, df)
+    risk_results = risk_engine.detect_all_risks()
+    
+    # Detect Event Trading Risks (Phase 3)
+    try:
+        event_risk_count = 0
+        if 'entry_time' in df.columns:
+            # Ensure safe datetime conversion (unparseable times become NaT and never match)
+            times = parse_trade_times(df['entry_time'])
+            event_risk_count = int(news_service.check_event_trading_risk_batch(times).sum())
+        
+        if event_risk_count:
+            # Add to risk_details
+            if "risk_details" not in risk_results:
+                risk_results["risk_details"] = {}
+                
+            risk_results["risk_details"]["event_trading"] = {
+                "name": "News Event Trading",
+                "severity": 85,
+                "description": f"Detected {event_risk_count} trades executed during high-impact news events (e.g. FOMC, NFP).",
+                "occurrences": event_risk_count
+            }
+            # Also append to the main list if structure differs, but risk_details is consistent
+            
+    except Exception as e:
+        print(f"News risk detection failed: {e}")
+
+    # Calculate score
+    scorer = RiskScorer()
+    score_result = scorer.calculate_score(risk_results["risk_details"])
+
+    return metrics, risk_results, score_result
+
+
+def detect_trade_patterns(df: pd.DataFrame) -> list:
+    """Detect behavioural patterns (ML + Heuristics, CPU Bound)"""
+    try:
+        pattern_detector = PatternDetector(df)
+        return pattern_detector.detect_all_patterns()
+    except Exception as e:
+        print(f"Pattern detection failed: {e}")
+        return []
@@ -22,20 +22,23 @@ class TradeMetricsCalculator:
         """Compute basic trading statistics"""
         df = self.df
         
+        # Filter the P&L column once instead of the whole frame per statistic
+        profit_loss = df['profit_loss']
+        wins = profit_loss[profit_loss > 0]
+        losses = profit_loss[profit_loss < 0]
+        
         self.metrics['total_trades'] = len(df)
-        self.metrics['winning_trades'] = len(df[df['profit_loss'] > 0])
-        self.metrics['losing_trades'] = len(df[df['profit_loss'] < 0])
+        self.metrics['winning_trades'] = len(wins)
+        self.metrics['losing_trades'] = len(losses)
         self.metrics['win_rate'] = (self.metrics['winning_trades'] / self.metrics['total_trades'] * 100 
                                    if self.metrics['total_trades'] > 0 else 0)
         
         # Profit metrics
-        self.metrics['total_profit'] = df[df['profit_loss'] > 0]['profit_loss'].sum()
-        self.metrics['total_loss'] = abs(df[df['profit_loss'] < 0]['profit_loss'].sum())
-        self.metrics['net_profit'] = df['profit_loss'].sum()
-        self.metrics['avg_win'] = (df[df['profit_loss'] > 0]['profit_loss'].mean() 
-                                  if self.metrics['winning_trades'] > 0 else 0)
-        self.metrics['avg_loss'] = (abs(df[df['profit_loss'] < 0]['profit_loss'].mean()) 
-                                   if self.metrics['losing_trades'] > 0 else 0)
+        self.metrics['total_profit'] = wins.sum()
+        self.metrics['total_loss'] = abs(losses.sum())
+        self.metrics['net_profit'] = profit_loss.sum()
+        self.metrics['avg_win'] = wins.mean() if self.metrics['winning_trades'] > 0 else 0
+        self.metrics['avg_loss'] = abs(losses.mean()) if self.metrics['losing_trades'] > 0 else 0
         
         # Profit factor
         if self.metrics['total_loss'] != 0:
@@ -59,12 +62,13 @@ class TradeMetricsCalculator:
             self.metrics['sl_usage_rate'] = (1 - sl_missing.sum() / len(df)) * 100
         
         # Risk-reward ratio
-        winning_trades = df[df['profit_loss'] > 0]
-        losing_trades = df[df['profit_loss'] < 0]
+        profit_loss = df['profit_loss']
+        winning_pl = profit_loss[profit_loss > 0]
+        losing_pl = profit_loss[profit_loss < 0]
         
-        if len(losing_trades) > 0 and len(winning_trades) > 0:
-            avg_risk = abs(losing_trades['profit_loss']).mean()
-            avg_reward = winning_trades['profit_loss'].mean()
+        if len(losing_pl) > 0 and len(winning_pl) > 0:
+            avg_risk = abs(losing_pl).mean()
+            avg_reward = winning_pl.mean()
             self.metrics['risk_reward_ratio'] = avg_reward / avg_risk if avg_risk != 0 else 0
         else:
             self.metrics['risk_reward_ratio'] = 0
@@ -75,17 +79,16 @@ class TradeMetricsCalculator:
         
         # Drawdown calculation
         if 'account_balance_before' in df.columns:
-            # Simple drawdown calculation
-            balances = df['account_balance_before'].tolist()
-            running_max = balances[0]
+            # Peak-to-trough drawdown against the running peak balance
+            balances = df['account_balance_before'].to_numpy(dtype=np.float64)
             max_drawdown_pct = 0
             
-            for balance in balances:
-                if balance > running_max:
-                    running_max = balance
-                drawdown_pct = (running_max - balance) / running_max * 100
-                if drawdown_pct > max_drawdown_pct:
-                    max_drawdown_pct = drawdown_pct
+            # A missing opening balance never sets a peak, so no drawdown is measured
+            if len(balances) and not np.isnan(balances[0]):
+                running_max = np.fmax.accumulate(balances)
+                drawdown_pct = (running_max - balances) / running_max * 100
+                if not np.isnan(drawdown_pct).all():
+                    max_drawdown_pct = max(max_drawdown_pct, float(np.nanmax(drawdown_pct)))
             
             self.metrics['max_drawdown_pct'] = max_drawdown_pct
     
@@ -6,6 +6,21 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import random
 
+import numpy as np
+import pandas as pd
+
+# High impact event windows (UTC): (hour, first minute, last minute, event name)
+EVENT_WINDOWS = [
+    (13, 25, 35, "US High Impact Data (CPI/NFP/PPI)"),  # Classic US news time
+    (19, 0, 10, "FOMC / Fed Interest Rate Decision"),
+]
+
+# Every minute-of-day inside an event window, for vectorized lookups
+EVENT_MINUTES = np.array(
+    sorted(hour * 60 + minute for hour, first, last, _ in EVENT_WINDOWS for minute in range(first, last + 1)),
+    dtype=np.int32
+)
+
 class NewsService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
@@ -66,15 +81,10 @@ class NewsService:
         is_news_time = False
         event_name = "Unknown Event"
         
-        # Classic US News times: 13:30 UTC
-        if hour == 13 and 25 <= minute <= 35:
-            is_news_time = True
-            event_name = "US High Impact Data (CPI/NFP/PPI)"
-            
-        # FOMC: 19:00 UTC
-        if hour == 19 and 0 <= minute <= 10:
-            is_news_time = True
-            event_name = "FOMC / Fed Interest Rate Decision"
+        for event_hour, first_minute, last_minute, name in EVENT_WINDOWS:
+            if hour == event_hour and first_minute <= minute <= last_minute:
+                is_news_time = True
+                event_name = name
             
         if is_news_time:
             return {
@@ -88,3 +98,15 @@ class NewsService:
             }
             
         return None
+
+    def check_event_trading_risk_batch(self, trade_times) -> np.ndarray:
+        """
+        Vectorized check_event_trading_risk: boolean mask of trades taken
+        inside a high impact event window. NaT entries never match.
+        """
+        times = pd.DatetimeIndex(trade_times)
+        minute_of_day = (times.hour * 60 + times.minute).fillna(-1).to_numpy(dtype=np.int32)
+        return np.isin(minute_of_day, EVENT_MINUTES)
+
+# Singleton instance (stateless, shared by every analysis)
+news_service = NewsService()
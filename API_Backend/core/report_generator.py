@@ -1,8 +1,12 @@
 # core/report_generator.py
+import hashlib
 import json
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import orjson
 import pandas as pd
+from cachetools import TTLCache
 
 class ReportGenerator:
     """Generate trade risk analysis reports"""
@@ -16,14 +20,25 @@ class ReportGenerator:
                                 score_result: Dict[str, Any],
                                 ai_explanations: Dict[str, Any]) -> str:
         """Generate a markdown format report"""
-        
-        report_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        report = f"""
+        return self._markdown_header(datetime.now()) + self._markdown_body(
+            metrics, risk_results, score_result, ai_explanations
+        )
+    
+    def _markdown_header(self, generated_at: datetime) -> str:
+        """Report title and timestamps, the only time-dependent part of the markdown"""
+        return f"""
 # 📊 TradeGuard AI - Risk Health Report
-**Generated:** {report_date}
-**Report ID:** TG-{datetime.now().strftime('%Y%m%d%H%M%S')}
-
+**Generated:** {generated_at.strftime("%Y-%m-%d %H:%M:%S")}
+**Report ID:** TG-{generated_at.strftime('%Y%m%d%H%M%S')}
+"""
+    
+    def _markdown_body(self,
+                       metrics: Dict[str, Any],
+                       risk_results: Dict[str, Any],
+                       score_result: Dict[str, Any],
+                       ai_explanations: Dict[str, Any]) -> str:
+        """Everything after the header; depends only on the analysis results"""
+        report = f"""
 ---
 
 ## 🎯 Executive Summary
@@ -141,8 +156,10 @@ class ReportGenerator:
     
     def generate_html_report(self, markdown_report: str) -> str:
         """Convert markdown report to HTML"""
-        # Simple HTML conversion
-        html = f"""
+        return self._html_head(datetime.now()) + self._markdown_to_html(markdown_report) + HTML_REPORT_FOOTER
+    
+    def _html_head(self, generated_at: datetime) -> str:
+        return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -167,11 +184,13 @@ class ReportGenerator:
     <div class="header">
         <h1>🛡️ TradeGuard AI</h1>
         <h2>Risk Health Check Report</h2>
-        <p>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+        <p>Generated: {generated_at.strftime("%Y-%m-%d %H:%M:%S")}</p>
     </div>
 """
-        
-        # Convert markdown to simple HTML
+    
+    def _markdown_to_html(self, markdown_report: str) -> str:
+        """Convert markdown to simple HTML, line by line"""
+        html = ""
         lines = markdown_report.split('\n')
         in_table = False
         table_html = ""
@@ -221,8 +240,11 @@ class ReportGenerator:
                 elif line.strip():
                     html += f'<p>{line}</p>\n'
         
-        # Add disclaimer section
-        html += """
+        return html
+
+
+# Disclaimer section closing every HTML report
+HTML_REPORT_FOOTER = """
     <div class="disclaimer">
         <h3>⚠️ Important Disclaimers</h3>
         <ul>
@@ -236,8 +258,62 @@ class ReportGenerator:
 </body>
 </html>
 """
-        
-        return html
+
+# Rendered report bodies (everything but the timestamped header), keyed by
+# format and a hash of the analysis results, so re-rendering an unchanged
+# analysis, e.g. in another format or again later, skips the templating
+REPORT_CACHE_TTL_SECONDS = 3600
+_report_body_cache = TTLCache(maxsize=256, ttl=REPORT_CACHE_TTL_SECONDS)
+_report_body_cache_lock = threading.Lock()
+_report_generator = ReportGenerator()
+
+
+def _report_fingerprint(metrics: Dict[str, Any],
+                        risk_results: Dict[str, Any],
+                        score_result: Dict[str, Any],
+                        ai_explanations: Dict[str, Any]) -> Optional[str]:
+    """Stable content hash of the report inputs, or None if unhashable"""
+    try:
+        payload = orjson.dumps(
+            (metrics, risk_results, score_result, ai_explanations),
+            default=str,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    except TypeError:
+        return None
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def generate_report_cached(report_format: str,
+                           metrics: Dict[str, Any],
+                           risk_results: Dict[str, Any],
+                           score_result: Dict[str, Any],
+                           ai_explanations: Dict[str, Any]) -> str:
+    """
+    Render a "markdown" or "html" report, reusing the cached body when the
+    same analysis results were rendered recently. The header is rendered
+    fresh each time so its timestamps stay current.
+    """
+    generator = _report_generator
+    fingerprint = _report_fingerprint(metrics, risk_results, score_result, ai_explanations)
+    body = None
+    if fingerprint is not None:
+        with _report_body_cache_lock:
+            body = _report_body_cache.get((report_format, fingerprint))
+
+    if body is None:
+        body = generator._markdown_body(metrics, risk_results, score_result, ai_explanations)
+        if report_format == "html":
+            body = generator._markdown_to_html(body)
+        if fingerprint is not None:
+            with _report_body_cache_lock:
+                _report_body_cache[(report_format, fingerprint)] = body
+
+    generated_at = datetime.now()
+    header = generator._markdown_header(generated_at)
+    if report_format == "html":
+        return generator._html_head(generated_at) + generator._markdown_to_html(header) + body + HTML_REPORT_FOOTER
+    return header + body
 
 # Test function
 def test_report_generator():
@@ -1,5 +1,6 @@
 # core/risk_scorer.py
 import json
+from bisect import bisect_right
 from typing import Dict, List, Any
 import numpy as np
 
@@ -28,6 +29,11 @@ class RiskScorer:
             'D': (0, 39)       # Critical risk
         }
         
+        # Grades ordered by lower bound, for the binary search in _get_grade
+        ordered_grades = sorted(self.grade_boundaries.items(), key=lambda item: item[1][0])
+        self._grade_lower_bounds = tuple(lower for _, (lower, _) in ordered_grades)
+        self._grade_labels = tuple(grade for grade, _ in ordered_grades)
+        
         # Grade colors
         self.grade_colors = {
             'A': '#10b981',    # Green
@@ -124,11 +130,13 @@ class RiskScorer:
         }
     
     def _get_grade(self, score: float) -> str:
-        """Determine grade based on score"""
-        for grade, (lower, upper) in self.grade_boundaries.items():
-            if lower <= score <= upper:
-                return grade
-        return 'D'  # Default to D if score is below 0
+        """
+        Determine grade based on score: the highest grade whose lower bound
+        the score reaches, so fractional scores between bands (e.g. 79.5)
+        get the lower band's grade. Scores below 0 get the lowest grade.
+        """
+        index = bisect_right(self._grade_lower_bounds, score) - 1
+        return self._grade_labels[max(index, 0)]
     
     def _create_risk_breakdown(self, breakdown: List[Dict]) -> Dict[str, float]:
         """Categorize risks by severity level"""
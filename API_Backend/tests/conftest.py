@@ -1,9 +1,21 @@
+import os
+import tempfile
+import uuid
+
 import pytest
 import requests
 import json
 
 BASE_URL = "http://localhost:8000"
 
+# In-process (TestClient) tests need these before the app is imported; they
+# get a throwaway SQLite file unless a database is configured
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'tradeguard_pytest.db')}"
+)
+os.environ.setdefault("SECRET_KEY", "pytest-secret-key")
+os.environ.setdefault("ENCRYPTION_SECRET", "pytest-encryption-secret")
+
 @pytest.fixture(scope="session")
 def token():
     """
@@ -32,3 +44,35 @@ def token():
     
     # If we couldn't get a token, fail the tests that need it.
     pytest.fail("Failed to get authentication token.")
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """
+    In-process client for the FastAPI app (runs the app lifespan), for
+    tests that don't need the live server on BASE_URL.
+    """
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def registered_user(app_client):
+    """
+    Register a fresh user through the app. Returns (user_id, email,
+    password, auth headers).
+    """
+    suffix = uuid.uuid4().hex[:12]
+    email = f"pytest_{suffix}@example.com"
+    password = "PytestPass123!"
+    response = app_client.post(
+        "/api/users/register",
+        json={"email": email, "username": f"pytest_{suffix}", "password": password}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    return data["user"]["id"], email, password, headers
@@ -0,0 +1,69 @@
+"""
+Tests for the AI explanation cache (no OpenAI calls)
+"""
+import pytest
+
+from core import ai_explainer
+
+METRICS = {"total_trades": 20, "win_rate": 0.55}
+RISKS = {"risk_details": {"overtrading": {"severity": 60}}}
+SCORE = {"score": 72.5, "grade": "C"}
+
+
+class _FakeExplainer:
+    calls = []
+
+    def __init__(self, openai_api_key=None):
+        self.api_key = openai_api_key
+
+    def generate_explanation(self, metrics, risk_results, score_result):
+        _FakeExplainer.calls.append(self.api_key)
+        return {
+            "risk_summary": f"explained for {self.api_key}",
+            "key_risks": ["overtrading"],
+            "ai_model": ai_explainer.AI_MODEL,
+        }
+
+
+@pytest.fixture(autouse=True)
+def fake_explainer(monkeypatch):
+    monkeypatch.setattr(ai_explainer, "AIRiskExplainer", _FakeExplainer)
+    monkeypatch.setattr(ai_explainer, "_explanation_cache", ai_explainer.TTLCache(maxsize=16, ttl=60))
+    _FakeExplainer.calls = []
+
+
+def test_cache_is_not_shared_between_api_keys():
+    first = ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+    second = ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-b")
+
+    assert first["risk_summary"] == "explained for sk-user-a"
+    assert second["risk_summary"] == "explained for sk-user-b"
+    assert _FakeExplainer.calls == ["sk-user-a", "sk-user-b"]
+
+
+def test_cache_reuses_explanations_for_the_same_key():
+    ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+    ai_explainer.generate_explanation_cached(dict(METRICS), RISKS, SCORE, openai_api_key="sk-user-a")
+
+    assert _FakeExplainer.calls == ["sk-user-a"]
+
+
+def test_cache_key_includes_the_model(monkeypatch):
+    ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+    monkeypatch.setattr(ai_explainer, "AI_MODEL", "another-model")
+    ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+
+    assert len(_FakeExplainer.calls) == 2
+
+
+def test_cached_explanations_are_returned_as_copies():
+    first = ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+    first["risk_summary"] = "changed by the caller"
+    first["key_risks"].append("leaked")
+
+    second = ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+    third = ai_explainer.generate_explanation_cached(METRICS, RISKS, SCORE, openai_api_key="sk-user-a")
+
+    assert second["risk_summary"] == "explained for sk-user-a"
+    assert second["key_risks"] == ["overtrading"]
+    assert second is not third
@@ -0,0 +1,104 @@
+"""
+Tests for running and listing analyses (in-process, via TestClient)
+"""
+from datetime import datetime, timedelta
+
+from api import models
+from api.database import SessionLocal
+from api.routers import analyze
+
+
+def _add_analysis(user_id, score, grade, created_at):
+    with SessionLocal() as db:
+        analysis = models.Analysis(
+            user_id=user_id,
+            original_filename=f"trades_{score}.csv",
+            trade_count=25,
+            score=score,
+            score_result={"score": score, "grade": grade},
+            created_at=created_at,
+        )
+        db.add(analysis)
+        db.commit()
+        return analysis.id
+
+
+def test_list_analyses_returns_a_page(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    now = datetime.utcnow()
+    oldest = _add_analysis(user_id, 45.0, "C", now - timedelta(days=3))
+    middle = _add_analysis(user_id, 85.0, "A", now - timedelta(days=2))
+    newest = _add_analysis(user_id, 65.0, "B", now - timedelta(days=1))
+
+    response = app_client.get("/api/analyze/", params={"limit": 2}, headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    data = body["data"]
+    assert (data["total"], data["skip"], data["limit"]) == (3, 0, 2)
+    assert [a["id"] for a in data["analyses"]] == [newest, middle]
+    assert data["analyses"][0]["grade"] == "B"
+    assert data["analyses"][0]["filename"] == "trades_65.0.csv"
+
+    response = app_client.get("/api/analyze/", params={"skip": 2, "limit": 2}, headers=headers)
+    assert [a["id"] for a in response.json()["data"]["analyses"]] == [oldest]
+
+
+def test_list_analyses_filters_by_score(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    now = datetime.utcnow()
+    _add_analysis(user_id, 45.0, "C", now - timedelta(days=1))
+    high = _add_analysis(user_id, 85.0, "A", now)
+
+    data = app_client.get("/api/analyze/", params={"min_score": 60}, headers=headers).json()["data"]
+
+    assert data["total"] == 1
+    assert [a["id"] for a in data["analyses"]] == [high]
+
+
+def test_list_analyses_with_no_rows_is_valid_json(app_client, registered_user):
+    data = app_client.get("/api/analyze/", headers=registered_user[3]).json()["data"]
+    assert data["analyses"] == []
+    assert data["total"] == 0
+
+
+def test_list_analyses_requires_authentication(app_client):
+    assert app_client.get("/api/analyze/").status_code in (401, 403)
+
+
+def test_analysis_is_stored_before_the_response(app_client, registered_user):
+    headers = registered_user[3]
+    response = app_client.post("/api/analyze/trades", params={"use_sample": True}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    analysis_id = response.json()["data"]["analysis_id"]
+    assert app_client.get(f"/api/analyze/{analysis_id}", headers=headers).status_code == 200
+
+
+def test_failed_save_is_reported_to_the_client(app_client, registered_user, monkeypatch):
+    async def failing_save(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(analyze, "save_analysis_to_db", failing_save)
+    response = app_client.post("/api/analyze/trades", params={"use_sample": True}, headers=registered_user[3])
+
+    assert response.status_code == 500
+    assert "database unavailable" in response.json()["detail"]
+
+
+def test_cached_results_are_returned_as_copies(app_client, monkeypatch):
+    monkeypatch.setattr(analyze, "_analysis_cache", analyze.TTLCache(maxsize=16, ttl=60))
+    df = analyze.SAMPLE_TRADES_DF.copy()
+
+    first = app_client.portal.call(analyze.process_trade_data, df)
+    expected_trades = first["metrics"]["total_trades"]
+    first["metrics"]["total_trades"] = -1
+    first["score_result"]["grade"] = "changed by the caller"
+
+    second = app_client.portal.call(analyze.process_trade_data, df)
+    third = app_client.portal.call(analyze.process_trade_data, df)
+
+    assert second["metrics"]["total_trades"] == expected_trades
+    assert second["score_result"]["grade"] != "changed by the caller"
+    assert second["metrics"] is not third["metrics"]
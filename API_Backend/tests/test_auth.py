@@ -0,0 +1,160 @@
+"""
+Tests for password hashing policy (in-process, via TestClient)
+"""
+import dataclasses
+
+import bcrypt
+import pytest
+
+from api import auth, models
+from api.database import SessionLocal
+
+
+def _stored_hash(user_id):
+    with SessionLocal() as db:
+        return db.query(models.User.hashed_password).filter(models.User.id == user_id).scalar()
+
+
+def _set_hash(user_id, hashed_password):
+    with SessionLocal() as db:
+        db.query(models.User).filter(models.User.id == user_id).update(
+            {models.User.hashed_password: hashed_password}
+        )
+        db.commit()
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def test_calibration_never_goes_below_floor(monkeypatch):
+    """Even an unreachable latency target keeps the minimum cost"""
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", auth.BCRYPT_ROUNDS)
+    assert auth.calibrate_bcrypt_rounds(target_ms=0, samples=1) == auth.BCRYPT_MIN_ROUNDS
+    assert auth.BCRYPT_ROUNDS == auth.BCRYPT_MIN_ROUNDS
+
+
+def test_password_needs_rehash_only_upgrades(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 12)
+    assert auth.password_needs_rehash("$2b$10$" + "a" * 53)
+    assert not auth.password_needs_rehash("$2b$12$" + "a" * 53)
+    assert not auth.password_needs_rehash("$2b$13$" + "a" * 53)
+    assert not auth.password_needs_rehash("not-a-bcrypt-hash")
+
+
+def test_login_keeps_cost_12_hash(app_client, registered_user, monkeypatch):
+    """Logging in with a cost-12 hash must not rewrite (weaken) it"""
+    # Restored after the test; a fast calibration target used to pick cost 10-11
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", auth.BCRYPT_ROUNDS)
+    auth.calibrate_bcrypt_rounds(target_ms=0, samples=1)
+    user_id, email, password, _ = registered_user
+    stored = _hash(password, 12)
+    _set_hash(user_id, stored)
+
+    response = app_client.post("/api/users/login", json={"email": email, "password": password})
+
+    assert response.status_code == 200, response.text
+    assert _stored_hash(user_id) == stored
+
+
+def test_login_never_downgrades_stronger_hash(app_client, registered_user, monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 12)
+    user_id, email, password, _ = registered_user
+    stored = _hash(password, 13)
+    _set_hash(user_id, stored)
+
+    response = app_client.post("/api/users/login", json={"email": email, "password": password})
+
+    assert response.status_code == 200, response.text
+    assert _stored_hash(user_id) == stored
+
+
+def test_login_upgrades_weaker_hash(app_client, registered_user, monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 12)
+    user_id, email, password, _ = registered_user
+    _set_hash(user_id, _hash(password, 10))
+
+    response = app_client.post("/api/users/login", json={"email": email, "password": password})
+
+    assert response.status_code == 200, response.text
+    upgraded = _stored_hash(user_id)
+    assert upgraded.split("$")[2] == "12"
+    assert bcrypt.checkpw(password.encode(), upgraded.encode())
+
+
+def test_cached_user_is_a_frozen_snapshot(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    assert app_client.get("/api/users/profile", headers=headers).status_code == 200
+
+    cached = auth._user_cache[user_id]
+    assert isinstance(cached, auth.AuthenticatedUser)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cached.is_active = False
+
+
+def test_deactivated_user_is_rejected_immediately(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    assert app_client.get("/api/users/profile", headers=headers).status_code == 200
+
+    with SessionLocal() as db:
+        db.get(models.User, user_id).is_active = False
+        db.commit()
+
+    response = app_client.get("/api/users/profile", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_invalidate_user_after_bulk_update(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    assert app_client.get("/api/users/profile", headers=headers).status_code == 200
+
+    with SessionLocal() as db:
+        db.query(models.User).filter(models.User.id == user_id).update(
+            {models.User.username: f"renamed_{user_id[:8]}"}
+        )
+        db.commit()
+    auth.invalidate_user(user_id)
+
+    response = app_client.get("/api/users/profile", headers=headers)
+    assert response.json()["data"]["username"] == f"renamed_{user_id[:8]}"
+
+
+def test_verified_tokens_are_cached(monkeypatch):
+    token = auth.create_access_token({"sub": "cached-user"})
+    assert auth.decode_access_token(token)["sub"] == "cached-user"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached token was verified again")
+
+    monkeypatch.setattr(auth.jwt, "decode", fail)
+    assert auth.decode_access_token(token)["sub"] == "cached-user"
+    # Only a digest of the token is kept
+    assert token not in auth._token_cache
+    assert auth._token_cache_key(token) in auth._token_cache
+
+
+def test_invalid_tokens_are_never_cached():
+    token = auth.create_access_token({"sub": "someone"}) + "tampered"
+    assert auth.decode_access_token(token) is None
+    assert auth._token_cache_key(token) not in auth._token_cache
+
+
+def test_cached_token_is_not_served_past_its_expiry(monkeypatch):
+    token = auth.create_access_token({"sub": "expiring"})
+    payload = auth.decode_access_token(token)
+
+    def reject(*args, **kwargs):
+        raise auth.JWTError("Signature has expired")
+
+    # Past the token's own exp, the cache entry is ignored and jwt rejects it
+    monkeypatch.setattr(auth.time, "time", lambda: payload["exp"] + 1)
+    monkeypatch.setattr(auth.jwt, "decode", reject)
+    assert auth.decode_access_token(token) is None
+
+
+def test_tokens_last_a_day_by_default():
+    assert type(auth.settings).model_fields["ACCESS_TOKEN_EXPIRE_MINUTES"].default == 1440
+
+    payload = auth.decode_access_token(auth.create_access_token({"sub": "default-expiry"}))
+    assert abs(payload["exp"] - auth.time.time() - 1440 * 60) < 60
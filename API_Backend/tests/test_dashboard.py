@@ -0,0 +1,66 @@
+"""
+Tests for dashboard aggregates (in-process, via TestClient)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import DateTime, literal, select
+
+from api import models
+from api.database import SessionLocal
+from api.routers.dashboard import _iso_week
+
+
+def _add_analysis(user_id, score, created_at, breakdown=None):
+    with SessionLocal() as db:
+        db.add(models.Analysis(
+            user_id=user_id,
+            filename="pytest.csv",
+            trade_count=10,
+            score=score,
+            score_result={"score": score, "risk_breakdown": breakdown or {}},
+            created_at=created_at,
+        ))
+        db.commit()
+
+
+@pytest.mark.parametrize("day", [
+    datetime(2020, 12, 27, 23, 59),  # Sunday, ISO week 52 of 2020
+    datetime(2020, 12, 31, 12, 0),   # ISO week 53 of 2020
+    datetime(2021, 1, 1, 0, 0),      # still ISO week 53 of 2020
+    datetime(2021, 1, 3, 23, 59),    # Sunday, still week 53
+    datetime(2021, 1, 4, 0, 0),      # Monday, ISO week 1 of 2021
+    datetime(2024, 12, 30, 8, 30),   # ISO week 1 of 2025
+    datetime(2026, 1, 1, 9, 0),      # Thursday, ISO week 1
+    datetime(2027, 1, 1, 9, 0),      # Friday, ISO week 53 of 2026
+])
+def test_iso_week_matches_isocalendar_across_year_boundaries(day):
+    with SessionLocal() as db:
+        week = db.scalar(select(_iso_week(db, literal(day, DateTime))))
+    assert week == day.isocalendar()[1]
+
+
+def test_summary_aggregates(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    now = datetime.utcnow()
+    _add_analysis(user_id, 60.0, now - timedelta(days=8), {"low": 1, "medium": 2, "high": 0})
+    _add_analysis(user_id, 80.0, now - timedelta(days=1), {"low": 3, "medium": 0, "high": 1})
+    _add_analysis(user_id, 0.0, now)  # unscored, left out of the averages
+
+    response = app_client.get("/api/dashboard/summary", headers=headers)
+
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert data["total_analyses"] == 3
+    assert data["average_score"] == 70.0
+    assert data["risk_distribution"] == {"low": 4, "medium": 2, "high": 1}
+    assert len(data["recent_analyses"]) == 3
+
+    expected_weeks = {}
+    for day, score in ((now - timedelta(days=8), 60.0), (now - timedelta(days=1), 80.0)):
+        expected_weeks.setdefault(day.isocalendar()[1], []).append(score)
+    trend = {point["week"]: point for point in data["improvement_trend"]}
+    assert set(trend) == set(expected_weeks)
+    for week, scores in expected_weeks.items():
+        assert trend[week]["analysis_count"] == len(scores)
+        assert trend[week]["average_score"] == sum(scores) / len(scores)
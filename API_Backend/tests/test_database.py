@@ -0,0 +1,26 @@
+"""
+Tests for database session handling (in-process, via TestClient)
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from api.database import engine, get_db
+
+
+def test_get_db_yields_a_fresh_session_and_closes_it():
+    first_dependency, second_dependency = get_db(), get_db()
+    first, second = next(first_dependency), next(second_dependency)
+    assert isinstance(first, Session)
+    assert first is not second
+
+    first.execute(text("SELECT 1"))
+    first_dependency.close()
+    second_dependency.close()
+    assert engine.pool.checkedout() == 0
+
+
+def test_sync_session_requests_release_their_connections(app_client, registered_user):
+    headers = registered_user[3]
+    for _ in range(3):
+        assert app_client.get("/api/dashboard/summary", headers=headers).status_code == 200
+    assert engine.pool.checkedout() == 0
@@ -0,0 +1,342 @@
+"""
+Tests for Deriv trade syncing (in-process, via TestClient, no live Deriv API)
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.database import AsyncSessionLocal, SessionLocal
+from api.models.integration_models import DerivConnection, DerivTrade, SyncLog, WebhookEvent
+from api.routers import integrations
+from api.utils import deriv_client
+from api.utils.deriv_client import DerivAPIClient, DerivAPIError
+from api.utils.encryption import encryption_service
+
+
+class _FakeWebSocket:
+    """Replays canned Deriv responses and records what was sent"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def recv(self):
+        return json.dumps(self.responses.pop(0))
+
+
+class _FailingClient:
+    """Stands in for DerivAPIClient when the profit_table fetch fails"""
+
+    async def test_connection(self):
+        return {"success": True, "account_info": {"loginid": "CR1"}}
+
+    async def get_trades(self, days_back):
+        raise DerivAPIError("Fetch failed: timed out")
+
+    async def get_trades_since(self, since):
+        raise DerivAPIError("Fetch failed: timed out")
+
+
+def _create_connection(user_id, last_successful_sync):
+    with SessionLocal() as db:
+        connection = DerivConnection(
+            user_id=user_id,
+            api_token_encrypted=encryption_service.encrypt("fake-token"),
+            app_id="1089",
+            connection_status="connected",
+            last_sync_status="success",
+            last_successful_sync=last_successful_sync,
+        )
+        db.add(connection)
+        db.commit()
+        return connection.id
+
+
+def _transactions(count, start_id):
+    return [
+        {"transaction_id": start_id + i, "contract_id": start_id + i, "buy_price": 10,
+         "sell_price": 12, "profit": 2, "purchase_time": 1700000000, "sell_time": 1700000060,
+         "shortcode": "CALL_R_100_10"}
+        for i in range(count)
+    ]
+
+
+def test_profit_table_network_error_raises(monkeypatch):
+    """A failed fetch must not look like an empty trade history"""
+    def refuse(url):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(deriv_client.websockets, "connect", refuse)
+    client = DerivAPIClient(api_token="fake-token")
+    with pytest.raises(DerivAPIError):
+        asyncio.run(client.get_trades_since(datetime.utcnow()))
+
+
+def test_profit_table_api_error_raises(monkeypatch):
+    socket = _FakeWebSocket([
+        {"authorize": {"loginid": "CR1"}},
+        {"error": {"message": "Rate limit reached"}},
+    ])
+    monkeypatch.setattr(deriv_client.websockets, "connect", lambda url: socket)
+    client = DerivAPIClient(api_token="fake-token")
+    with pytest.raises(DerivAPIError, match="Rate limit"):
+        asyncio.run(client.get_trades(days_back=7))
+
+
+def test_profit_table_pages_through_all_transactions(monkeypatch):
+    page_size = deriv_client.PROFIT_TABLE_PAGE_SIZE
+    socket = _FakeWebSocket([
+        {"authorize": {"loginid": "CR1"}},
+        {"profit_table": {"transactions": _transactions(page_size, 1)}},
+        {"profit_table": {"transactions": _transactions(3, page_size + 1)}},
+    ])
+    monkeypatch.setattr(deriv_client.websockets, "connect", lambda url: socket)
+    client = DerivAPIClient(api_token="fake-token")
+
+    trades = asyncio.run(client.get_trades(days_back=7))
+
+    assert len(trades) == page_size + 3
+    assert [request["offset"] for request in socket.sent[1:]] == [0, page_size]
+
+
+def test_failed_incremental_sync_keeps_last_successful_sync(app_client, registered_user, monkeypatch):
+    """A failed fetch marks the sync failed and leaves the incremental watermark alone"""
+    user_id = registered_user[0]
+    watermark = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    connection_id = _create_connection(user_id, watermark)
+    monkeypatch.setattr(integrations, "get_client_for_connection", lambda connection: _FailingClient())
+
+    app_client.portal.call(integrations.sync_trades_background_task, connection_id, 30, False, False)
+
+    with SessionLocal() as db:
+        connection = db.get(DerivConnection, connection_id)
+        assert connection.last_successful_sync == watermark
+        assert connection.last_sync_status == "failed"
+        assert "timed out" in connection.last_error
+        sync_log = db.query(SyncLog).filter(SyncLog.connection_id == connection_id).one()
+        assert sync_log.status == "failed"
+
+
+def test_duplicate_syncs_are_merged_and_never_run_concurrently(app_client, monkeypatch):
+    calls = []
+    running = set()
+    release = None
+
+    async def fake_sync(connection_id, days_back, force_full_sync, analyze_after_sync):
+        assert connection_id not in running, "two syncs of one connection ran at once"
+        running.add(connection_id)
+        calls.append((connection_id, days_back, force_full_sync, analyze_after_sync))
+        await release.wait()
+        running.discard(connection_id)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        # Two requests for the same connection before a worker picks either up
+        assert integrations.enqueue_syncs([("conn-a", 30, False, False)])
+        assert integrations.enqueue_syncs([("conn-a", 90, True, False), ("conn-a", 7, False, True)])
+        assert integrations._sync_queue.qsize() == 1
+        assert integrations._queued_syncs["conn-a"] == [90, True, True]
+
+        for _ in range(100):
+            if calls:
+                break
+            await asyncio.sleep(0.01)
+        # Requests while it runs become one follow-up, run after it finishes
+        assert integrations.enqueue_syncs([("conn-a", 30, False, False)])
+        assert integrations.enqueue_syncs([("conn-a", 60, False, True)])
+        assert "conn-a" not in integrations._queued_syncs
+        assert integrations._followup_syncs["conn-a"] == [60, False, True]
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1
+
+        release.set()
+        for _ in range(100):
+            if "conn-a" not in integrations._running_syncs:
+                break
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(integrations, "sync_trades_background_task", fake_sync)
+    app_client.portal.call(scenario)
+
+    assert calls == [("conn-a", 90, True, True), ("conn-a", 60, False, True)]
+    assert "conn-a" not in integrations._running_syncs
+    assert "conn-a" not in integrations._followup_syncs
+
+
+def _claim_connection(connection_id, claimed_at):
+    with SessionLocal() as db:
+        connection = db.get(DerivConnection, connection_id)
+        connection.last_sync_status = "syncing"
+        connection.last_sync_at = claimed_at
+        db.commit()
+
+
+def test_sync_skips_a_connection_claimed_by_another_worker(app_client, registered_user, monkeypatch):
+    connection_id = _create_connection(registered_user[0], None)
+    _claim_connection(connection_id, datetime.utcnow())
+    monkeypatch.setattr(integrations, "get_client_for_connection", lambda connection: _FailingClient())
+
+    app_client.portal.call(integrations.sync_trades_background_task, connection_id, 30, False, False)
+
+    with SessionLocal() as db:
+        assert db.query(SyncLog).filter(SyncLog.connection_id == connection_id).count() == 0
+        assert db.get(DerivConnection, connection_id).last_sync_status == "syncing"
+
+
+def test_sync_takes_over_an_abandoned_claim(app_client, registered_user, monkeypatch):
+    connection_id = _create_connection(registered_user[0], None)
+    _claim_connection(connection_id, datetime.utcnow() - integrations.SYNC_CLAIM_TIMEOUT - timedelta(minutes=1))
+    monkeypatch.setattr(integrations, "get_client_for_connection", lambda connection: _FailingClient())
+
+    app_client.portal.call(integrations.sync_trades_background_task, connection_id, 30, False, False)
+
+    with SessionLocal() as db:
+        # It ran (and failed on the fake fetch), releasing the claim
+        assert db.get(DerivConnection, connection_id).last_sync_status == "failed"
+
+
+def test_sync_endpoint_reports_connections_already_syncing(app_client, registered_user):
+    user_id, _, _, headers = registered_user
+    connection_id = _create_connection(user_id, None)
+    _claim_connection(connection_id, datetime.utcnow())
+
+    response = app_client.post(
+        "/api/integrations/deriv/sync", params={"connection_id": connection_id}, json={}, headers=headers
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["data"]["connections_syncing"] == []
+    assert body["data"]["connections_already_syncing"] == [connection_id]
+    assert "already syncing" in body["message"]
+
+
+def _stored_webhook_event(event_id):
+    with SessionLocal() as db:
+        return db.get(WebhookEvent, event_id)
+
+
+def test_webhook_is_stored_directly_without_a_writer(app_client, monkeypatch):
+    monkeypatch.setattr(integrations, "_webhook_writer", None)
+
+    response = app_client.post("/api/integrations/deriv/webhook", json={"event": "balance"})
+
+    assert response.status_code == 200, response.text
+    event_id = response.json()["data"]["event_id"]
+    assert _stored_webhook_event(event_id) is not None
+
+
+def test_webhook_is_stored_by_the_writer(app_client):
+    response = app_client.post(
+        "/api/integrations/deriv/webhook",
+        json={"event": "transaction", "transaction": {"transaction_id": "tx-1"}}
+    )
+
+    assert response.status_code == 200, response.text
+    event_id = response.json()["data"]["event_id"]
+    for _ in range(50):
+        stored = _stored_webhook_event(event_id)
+        if stored is not None:
+            break
+        time.sleep(0.05)
+    assert stored is not None
+    assert stored.processed and stored.trade_id == "tx-1"
+
+
+def test_failed_webhook_writes_are_logged_with_event_ids(app_client, monkeypatch, caplog):
+    class BrokenSession:
+        async def __aenter__(self):
+            raise RuntimeError("database is down")
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(integrations, "AsyncSessionLocal", BrokenSession)
+    monkeypatch.setattr(integrations, "_webhook_writer", None)
+
+    with caplog.at_level(logging.ERROR, logger="api"):
+        response = app_client.post("/api/integrations/deriv/webhook", json={"event": "balance"})
+
+    # Not acknowledged, so Deriv retries it
+    assert response.status_code == 500
+    assert "Failed to store 1 webhook events" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.ERROR, logger="api"), pytest.raises(RuntimeError):
+        app_client.portal.call(integrations.write_webhook_events, [{"id": "evt-a"}, {"id": "evt-b"}])
+    assert "evt-a, evt-b" in caplog.text
+
+
+def _trades(transactions):
+    client = DerivAPIClient(api_token="fake-token")
+    return [client.transform_transaction_to_trade(tx) for tx in transactions]
+
+
+def _upsert(app_client, connection_id, trades):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            counts = await integrations.upsert_deriv_trades(db, connection_id, trades)
+            await db.commit()
+            return counts
+
+    return app_client.portal.call(run)
+
+
+def _stored_trades(connection_id):
+    with SessionLocal() as db:
+        trades = db.query(DerivTrade).filter(DerivTrade.connection_id == connection_id).all()
+        return {trade.deriv_trade_id: trade.profit for trade in trades}
+
+
+def test_upsert_counts_new_and_updated_trades(app_client, registered_user):
+    connection_id = _create_connection(registered_user[0], None)
+
+    assert _upsert(app_client, connection_id, _trades(_transactions(3, 1))) == (3, 0)
+
+    changed = _transactions(2, 2)
+    changed[0]["profit"] = -4
+    # Trade 2 changed, trade 3 unchanged, trade 4 new (sent twice: last one wins)
+    batch = _trades(changed + _transactions(1, 4) + [dict(_transactions(1, 4)[0], profit=7)])
+    assert _upsert(app_client, connection_id, batch) == (1, 2)
+
+    assert _stored_trades(connection_id) == {"1": 2.0, "2": -4.0, "3": 2.0, "4": 7.0}
+    assert _upsert(app_client, connection_id, []) == (0, 0)
+
+
+def test_incremental_sync_fetches_from_the_last_successful_sync(app_client, registered_user, monkeypatch):
+    watermark = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=30)
+    connection_id = _create_connection(registered_user[0], watermark)
+    requested = []
+
+    class RecordingClient(_FailingClient):
+        async def get_trades_since(self, since):
+            requested.append(since)
+            return _trades(_transactions(2, 100))
+
+    monkeypatch.setattr(integrations, "get_client_for_connection", lambda connection: RecordingClient())
+    started = datetime.utcnow()
+
+    app_client.portal.call(integrations.sync_trades_background_task, connection_id, 30, False, False)
+
+    assert requested == [watermark - integrations.INCREMENTAL_SYNC_OVERLAP]
+    with SessionLocal() as db:
+        connection = db.get(DerivConnection, connection_id)
+        assert connection.last_sync_status == "success"
+        assert connection.last_successful_sync >= started
+        assert connection.total_trades_synced == 2
+        sync_log = db.query(SyncLog).filter(SyncLog.connection_id == connection_id).one()
+        assert (sync_log.status, sync_log.trades_fetched, sync_log.trades_new) == ("success", 2, 2)
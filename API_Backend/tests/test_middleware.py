@@ -0,0 +1,21 @@
+"""
+Tests for the API middleware
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.middleware import LoggingMiddleware
+
+
+def test_logging_middleware_always_sets_process_time():
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    response = TestClient(app).get("/ping")
+
+    assert response.status_code == 200
+    assert float(response.headers["X-Process-Time"]) >= 0
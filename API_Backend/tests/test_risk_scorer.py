@@ -0,0 +1,32 @@
+"""
+Tests for risk score grading
+"""
+import pytest
+
+from core.risk_scorer import RiskScorer
+
+
+@pytest.mark.parametrize("score, grade", [
+    (100, "A"),
+    (80, "A"),
+    (79.99, "B"),
+    (79.5, "B"),
+    (60, "B"),
+    (59.5, "C"),
+    (40, "C"),
+    (39.9, "D"),
+    (0, "D"),
+    (-5, "D"),
+])
+def test_grade_bands(score, grade):
+    assert RiskScorer()._get_grade(score) == grade
+
+
+def test_grades_match_the_boundary_table_for_whole_scores():
+    scorer = RiskScorer()
+    for score in range(0, 101):
+        expected = next(
+            grade for grade, (lower, upper) in scorer.grade_boundaries.items()
+            if lower <= score <= upper
+        )
+        assert scorer._get_grade(score) == expected
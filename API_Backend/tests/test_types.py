@@ -0,0 +1,44 @@
+"""
+Tests for the GUID column type (in-process, via TestClient)
+"""
+import uuid
+
+import pytest
+from sqlalchemy.exc import StatementError
+
+from api import models
+from api.database import SessionLocal
+
+
+def test_malformed_id_lookups_match_nothing():
+    with SessionLocal() as db:
+        assert db.query(models.Analysis).filter(models.Analysis.id == "not-a-uuid").first() is None
+        assert db.query(models.Analysis).filter(models.Analysis.id.in_(["not-a-uuid"])).all() == []
+
+
+def test_malformed_foreign_key_is_never_written_as_null():
+    with SessionLocal() as db:
+        db.add(models.Report(analysis_id="not-a-uuid", report_type="markdown", content=""))
+        with pytest.raises(StatementError) as excinfo:
+            db.commit()
+    assert isinstance(excinfo.value.orig, ValueError)
+
+
+def test_ids_are_stored_and_returned_canonically(registered_user):
+    user_id = registered_user[0]
+    with SessionLocal() as db:
+        analysis = models.Analysis(user_id=uuid.UUID(user_id).hex, filename="pytest.csv")
+        db.add(analysis)
+        db.commit()
+        assert analysis.user_id == user_id
+        assert db.query(models.Analysis).filter(models.Analysis.id == analysis.id.upper()).one() is analysis
+
+
+def test_malformed_ids_are_rejected_at_the_api(app_client, registered_user):
+    headers = registered_user[3]
+
+    response = app_client.post("/api/reports/generate", json={"analysis_id": "not-a-uuid"}, headers=headers)
+    assert response.status_code == 422
+
+    response = app_client.get("/api/analyze/not-a-uuid", headers=headers)
+    assert response.status_code == 404